@@ -0,0 +1,110 @@
+import argparse
+import json
+import random
+import re
+import sys
+from os import path
+from time import perf_counter
+
+# the folder that contains romOrganizerDeluxe.py
+progFolder = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.append(progFolder)
+
+import romNames
+import organizer
+import romScorer
+from datLoader import iterDatGames
+
+# the name parser before parsed names were cached (rebuilds its patterns on every call)
+def getAttributeSplitUncached(name):
+	mna = [s.strip() for s in re.split('\(|\)', name) if s.strip() != ""]
+	mergeNameArray = []
+	mergeNameArray.append(mna[0])
+	if len(mna) > 1:
+		for i in range(1, len(mna)):
+			if not ("," in mna[i] or "+" in mna[i]):
+				mergeNameArray.append(mna[i])
+			else:
+				arrayWithComma = [s.strip() for s in re.split('\,|\+', mna[i]) if s.strip() != ""]
+				for att2 in arrayWithComma:
+					mergeNameArray.append(att2)
+	return mergeNameArray
+
+"""
+	Returns the (biases, zones, clones) of every game in a database file, or of randomly generated games if no database file is given.
+"""
+def loadGames(databaseFile, numGames):
+	if databaseFile is not None:
+		isNoIntro = path.splitext(databaseFile)[1].lower() == ".xmdb"
+		return [(game.biases, game.zones, game.clones) for game in iterDatGames(databaseFile, isNoIntro)]
+	rng = random.Random(0)
+	regions = [("USA", "U"), ("Europe", "E"), ("Japan", "J"), ("USA, Europe", "U"), ("Germany", "G"), ("World", "U")]
+	extras = ["", " (Rev 1)", " (Rev A)", " (v1.1)", " (En,Fr,De)", " (Beta)", " (Proto)", " (Demo)", " (Virtual Console)", " (Unl)"]
+	games = []
+	for i in range(numGames):
+		title = "Game "+str(i)+(" - The Sequel" if i%7 == 0 else "")
+		gameRegions = rng.sample(regions, rng.randint(1, 3))
+		biases = tuple(title+" ("+region+")" for region, zone in gameRegions)
+		zones = tuple(zone for region, zone in gameRegions)
+		clones = tuple(bias+rng.choice(extras) for bias in biases for j in range(rng.randint(1, 2)))
+		games.append((biases, zones, tuple(dict.fromkeys(clones))))
+	return games
+
+"""
+	Parses every name the way a scan and a 1G1R copy do: the zone of each clone, the merge name of each game, the best clone of each game and its attributes, and the matching region of each game's clones.
+"""
+def runWorkload(games):
+	for biases, zones, clones in games:
+		for clone in clones:
+			romNames.getCloneZone(clone)
+		romNames.getBestMergeName(biases, zones)
+		cloneFiles = [clone+".zip" for clone in clones]
+		bestRom = romScorer.getBestRom(cloneFiles)
+		organizer.getAttributeSplit(bestRom)
+		organizer.getMatchingRegion(cloneFiles)
+
+def timeWorkload(games, splitFunction, numRuns):
+	romNames.getAttributeSplit = splitFunction
+	organizer.getAttributeSplit = splitFunction
+	romScorer.getAttributeSplit = splitFunction
+	times = []
+	for i in range(numRuns):
+		romNames.parseName.cache_clear()
+		startTime = perf_counter()
+		runWorkload(games)
+		times.append(perf_counter()-startTime)
+	return min(times)
+
+def main():
+	parser = argparse.ArgumentParser(description="Compares the cached name parser to the old uncached one.")
+	parser.add_argument("databaseFile", nargs="?", default=None, help="a No-Intro XMDB or Redump DAT file (default: randomly generated games)")
+	parser.add_argument("--games", type=int, default=20000, help="the number of generated games, if no database file is given (default: 20000)")
+	parser.add_argument("--runs", type=int, default=3, help="the number of runs; the fastest is kept (default: 3)")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	args = parser.parse_args()
+
+	games = loadGames(args.databaseFile, args.games)
+	cachedSplit = romNames.getAttributeSplit
+	uncachedTime = timeWorkload(games, getAttributeSplitUncached, args.runs)
+	cachedTime = timeWorkload(games, cachedSplit, args.runs)
+	cacheInfo = romNames.parseName.cache_info()
+	results = {
+		"databaseFile" : args.databaseFile,
+		"games" : len(games),
+		"clones" : sum(len(game[2]) for game in games),
+		"uncachedSeconds" : uncachedTime,
+		"cachedSeconds" : cachedTime,
+		"speedup" : uncachedTime/max(cachedTime, 1e-9),
+		"cacheHits" : cacheInfo.hits,
+		"cacheMisses" : cacheInfo.misses
+	}
+	if args.json:
+		print(json.dumps(results, indent=2))
+	else:
+		print(str(results["games"])+" games, "+str(results["clones"])+" clones")
+		print("Uncached: "+str(round(uncachedTime*1000, 1))+" ms")
+		print("Cached: "+str(round(cachedTime*1000, 1))+" ms ("+str(cacheInfo.hits)+" hits, "+str(cacheInfo.misses)+" misses)")
+		print("Speedup: "+str(round(results["speedup"], 2))+"x")
+
+if __name__ == '__main__':
+	main()
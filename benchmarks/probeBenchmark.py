@@ -0,0 +1,96 @@
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+from os import path, makedirs, scandir
+from time import perf_counter, sleep
+from types import SimpleNamespace
+
+# the folder that contains romOrganizerDeluxe.py
+progFolder = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.append(progFolder)
+
+import pathProber
+from pathProber import PathProber
+
+"""
+	Creates a device folder with a folder for each game (spread over a few system folders), each holding one or two files, and returns the paths of every file that a sync would check: the files on the device, and as many files that aren't there yet.
+"""
+def createDeviceFolder(deviceFolder, numGames, seed):
+	rng = random.Random(seed)
+	filePaths = []
+	for i in range(numGames):
+		gameFolder = path.join(deviceFolder, "System "+str(i%4), "[Region "+str(rng.randint(0, 3))+"]", "Game "+str(i))
+		makedirs(gameFolder)
+		for j in range(rng.randint(1, 2)):
+			filePath = path.join(gameFolder, "Game "+str(i)+" (Disc "+str(j+1)+").bin")
+			with open(filePath, "wb") as f:
+				f.write(b"\0"*rng.randint(1, 64))
+			filePaths.append(filePath)
+		filePaths.append(path.join(gameFolder, "Game "+str(i)+" (Rev 1).bin"))
+	rng.shuffle(filePaths)
+	return filePaths
+
+"""
+	Makes every file system call of the prober wait for the given number of seconds first, like a drive behind a USB hub or on a network would.
+"""
+def simulateLatency(latency):
+	def delayed(function):
+		def delayedFunction(*args):
+			sleep(latency)
+			return function(*args)
+		return delayedFunction
+	pathProber.path = SimpleNamespace(isfile=delayed(path.isfile), getsize=delayed(path.getsize), join=path.join)
+	pathProber.scandir = delayed(scandir)
+
+def timeProber(prober, filePaths, deviceFolder, numRuns):
+	probeTimes = []
+	walkTimes = []
+	for i in range(numRuns):
+		startTime = perf_counter()
+		exists = prober.filesExist(filePaths)
+		probeTimes.append(perf_counter()-startTime)
+		startTime = perf_counter()
+		tree = prober.walk(deviceFolder, withStats=True)
+		walkTimes.append(perf_counter()-startTime)
+	return min(probeTimes), min(walkTimes), exists, tree
+
+def main():
+	parser = argparse.ArgumentParser(description="Compares checking device files one at a time to checking them concurrently, optionally with a simulated drive latency.")
+	parser.add_argument("--games", type=int, default=2000, help="the number of game folders on the device (default: 2000)")
+	parser.add_argument("--latency", type=float, default=1.0, help="the simulated latency of each file system call in milliseconds; 0 uses the real drive (default: 1.0)")
+	parser.add_argument("--in-flight", type=int, nargs="+", default=[4, 16, 64], help="the in-flight limits to compare to checking one file at a time (default: 4 16 64)")
+	parser.add_argument("--runs", type=int, default=1, help="the number of runs; the fastest is kept (default: 1)")
+	parser.add_argument("--seed", type=int, default=0, help="the random seed of the device folder (default: 0)")
+	parser.add_argument("--folder", default=None, help="the folder to create the device folder in (default: the system's temporary folder)")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	args = parser.parse_args()
+
+	deviceFolder = tempfile.mkdtemp(prefix="probe-benchmark-", dir=args.folder)
+	try:
+		filePaths = createDeviceFolder(deviceFolder, args.games, args.seed)
+		if args.latency > 0:
+			simulateLatency(args.latency/1000)
+		results = {"games" : args.games, "files" : len(filePaths), "latencyMs" : args.latency, "runs" : []}
+		serialProbe, serialWalk, serialExists, serialTree = timeProber(PathProber(1), filePaths, deviceFolder, args.runs)
+		results["runs"].append({"maxInFlight" : 1, "probeSeconds" : serialProbe, "walkSeconds" : serialWalk})
+		for maxInFlight in args.in_flight:
+			probeTime, walkTime, exists, tree = timeProber(PathProber(maxInFlight), filePaths, deviceFolder, args.runs)
+			if exists != serialExists or tree != serialTree:
+				print("ERROR: The results with "+str(maxInFlight)+" probes in flight don't match the results of checking one file at a time.")
+				sys.exit(1)
+			results["runs"].append({"maxInFlight" : maxInFlight, "probeSeconds" : probeTime, "walkSeconds" : walkTime})
+	finally:
+		shutil.rmtree(deviceFolder, ignore_errors=True)
+	if args.json:
+		print(json.dumps(results, indent=2))
+		return
+	print(str(results["files"])+" files checked, "+str(args.games)+" game folders, "+str(args.latency)+" ms simulated latency")
+	for run in results["runs"]:
+		print("  "+str(run["maxInFlight"])+" in flight: check "+str(round(run["probeSeconds"]*1000, 1))+" ms ("+str(round(serialProbe/run["probeSeconds"], 2))+"x), walk "
+			+str(round(run["walkSeconds"]*1000, 1))+" ms ("+str(round(serialWalk/run["walkSeconds"], 2))+"x)")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import subprocess
+import sys
+from os import path
+from statistics import median
+
+# the folder that contains romOrganizerDeluxe.py
+progFolder = path.dirname(path.dirname(path.realpath(__file__)))
+
+# run in a fresh interpreter, so nothing is already imported
+importScript = """
+import sys, time
+startTime = time.perf_counter()
+import romOrganizerDeluxe
+importTime = time.perf_counter()-startTime
+heavyModules = [m for m in ["numpy", "tkinter"] if m in sys.modules]
+print("RESULT", importTime, ",".join(heavyModules))
+"""
+
+"""
+	Imports romOrganizerDeluxe in a new Python process and measures how long the import takes.
+
+	Returns
+	-------
+	tuple
+		The import time in seconds, and a list of heavy modules (numpy and tkinter) that were imported at startup.
+"""
+def measureImportTime():
+	result = subprocess.run([sys.executable, "-c", importScript], cwd=progFolder, capture_output=True, text=True)
+	for line in result.stdout.splitlines():
+		if line.startswith("RESULT "):
+			parts = line.split(" ")
+			return float(parts[1]), [m for m in parts[2].split(",") if m != ""]
+	raise RuntimeError("romOrganizerDeluxe could not be imported:\n"+result.stdout+result.stderr)
+
+def main():
+	parser = argparse.ArgumentParser(description="Measures the cold-start import time of romOrganizerDeluxe.py.")
+	parser.add_argument("--runs", type=int, default=5, help="the number of times to import the program (default: 5)")
+	parser.add_argument("--target", type=float, default=0.5, help="the maximum median import time in seconds (default: 0.5)")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	args = parser.parse_args()
+
+	importTimes = []
+	heavyModules = set()
+	for i in range(args.runs):
+		importTime, currHeavyModules = measureImportTime()
+		importTimes.append(importTime)
+		heavyModules.update(currHeavyModules)
+	medianTime = median(importTimes)
+	passed = medianTime <= args.target and len(heavyModules) == 0
+	if args.json:
+		print(json.dumps({
+			"runs" : args.runs,
+			"importTimes" : importTimes,
+			"medianImportTime" : medianTime,
+			"target" : args.target,
+			"heavyModules" : sorted(heavyModules),
+			"passed" : passed
+		}, indent=2))
+	else:
+		print("Import times: "+", ".join(str(round(t*1000, 1))+" ms" for t in importTimes))
+		print("Median: "+str(round(medianTime*1000, 1))+" ms (target: "+str(round(args.target*1000, 1))+" ms)")
+		if len(heavyModules) > 0:
+			print("Imported at startup: "+", ".join(sorted(heavyModules)))
+		print("PASSED" if passed else "FAILED")
+	sys.exit(0 if passed else 1)
+
+if __name__ == '__main__':
+	main()
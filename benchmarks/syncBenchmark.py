@@ -0,0 +1,116 @@
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from os import path, devnull
+from time import perf_counter
+
+# the folder that contains romOrganizerDeluxe.py
+progFolder = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.append(progFolder)
+
+from organizer import Organizer
+from copyEngine import outputModes
+from syntheticRomsets import SyntheticCollection
+
+phaseNames = ["scanRomset", "copyRomset", "copyOther", "updateOther"]
+
+"""
+	Generates a synthetic collection and runs a full sync of it (scan and copy every romset, copy every Other folder, then update the update folder from the device), timing each phase.
+
+	Parameters
+	----------
+	numGames : int
+		The number of games in the collection.
+	seed : int
+		The random seed of the collection.
+	workFolder : str
+		The folder that the collection is created in (it is deleted afterwards).
+	outputMode : str
+		How files are put in the device folder (see copyEngine.outputModes).
+	verbose : bool
+		If True, the program's own output is printed; otherwise it is discarded.
+
+	Returns
+	-------
+	dict
+		The size of the collection, the time it took to generate it, and the time of each phase in seconds.
+"""
+def runSync(numGames, seed, workFolder, outputMode="copy", verbose=False):
+	baseFolder = tempfile.mkdtemp(prefix="sync-benchmark-", dir=workFolder)
+	try:
+		startTime = perf_counter()
+		collection = SyntheticCollection(baseFolder, numGames, seed)
+		collection.settings.outputMode = outputMode
+		generateTime = perf_counter()-startTime
+		phaseTimes = dict.fromkeys(phaseNames, 0.0)
+		with open(devnull, "w") as nullOutput, redirect_stdout(sys.stdout if verbose else nullOutput):
+			organizer = Organizer(collection.settings, collection.deviceName, collection.deviceProfile, collection.outputFolder)
+			profile = organizer.profile
+			for systemName, romsetCategory in collection.systems:
+				databaseFile, isNoIntro = organizer.findDatabaseFile(systemName)
+				startTime = perf_counter()
+				romsetScan = organizer.scanRomset(systemName, databaseFile, isNoIntro, allowInterruptions=False)
+				phaseTimes["scanRomset"] += perf_counter()-startTime
+				startTime = perf_counter()
+				organizer.copyRomset(romsetScan, romsetCategory, profile.ignoredAttributes, profile.primaryRegions)
+				phaseTimes["copyRomset"] += perf_counter()-startTime
+			for systemName in collection.otherSystems:
+				startTime = perf_counter()
+				organizer.copyOther(systemName, profile.ignoredAttributes)
+				phaseTimes["copyOther"] += perf_counter()-startTime
+			startTime = perf_counter()
+			organizer.updateOther()
+			phaseTimes["updateOther"] += perf_counter()-startTime
+		return {
+			"games" : collection.numGames,
+			"clones" : collection.numClones,
+			"files" : collection.numFiles,
+			"generateSeconds" : generateTime,
+			"phases" : phaseTimes
+		}
+	finally:
+		shutil.rmtree(baseFolder, ignore_errors=True)
+
+def main():
+	parser = argparse.ArgumentParser(description="Times a full sync of synthetic collections of different sizes.")
+	parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="the number of games in each collection (default: 1000 10000 100000)")
+	parser.add_argument("--runs", type=int, default=1, help="the number of runs at each scale; the fastest time of each phase is kept (default: 1)")
+	parser.add_argument("--seed", type=int, default=0, help="the random seed of the collections (default: 0)")
+	parser.add_argument("--output-mode", default="copy", choices=outputModes, help="how files are put in the device folder (default: copy)")
+	parser.add_argument("--folder", default=None, help="the folder to create the collections in (default: the system's temporary folder)")
+	parser.add_argument("--output", default=None, help="also write the results as JSON to this file")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	parser.add_argument("--verbose", action="store_true", help="print the program's own output")
+	args = parser.parse_args()
+
+	results = {
+		"python" : platform.python_version(),
+		"platform" : platform.platform(),
+		"seed" : args.seed,
+		"outputMode" : args.output_mode,
+		"scales" : []
+	}
+	for numGames in args.scales:
+		runs = [runSync(numGames, args.seed, args.folder, args.output_mode, args.verbose) for i in range(args.runs)]
+		scaleResult = dict(runs[0])
+		scaleResult["runs"] = args.runs
+		scaleResult["phases"] = {phaseName : min(run["phases"][phaseName] for run in runs) for phaseName in phaseNames}
+		scaleResult["totalSeconds"] = sum(scaleResult["phases"].values())
+		results["scales"].append(scaleResult)
+		if not args.json:
+			print(str(scaleResult["games"])+" games, "+str(scaleResult["clones"])+" clones, "+str(scaleResult["files"])+" files")
+			for phaseName in phaseNames:
+				print("  "+phaseName+": "+str(round(scaleResult["phases"][phaseName]*1000, 1))+" ms")
+			print("  Total: "+str(round(scaleResult["totalSeconds"]*1000, 1))+" ms")
+	if args.output is not None:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent=2)
+	if args.json:
+		print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,273 @@
+import argparse
+import random
+import sys
+import zipfile
+from os import path, makedirs
+from types import SimpleNamespace
+
+# the folder that contains romOrganizerDeluxe.py
+progFolder = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.append(progFolder)
+
+from organizer import settingNames
+
+# (system name, romset category, is No-Intro, file extension inside each zip); games are split evenly between these systems
+syntheticSystems = [
+	("Nintendo - Synthetic Boy", "1G1R", True, ".gb"),
+	("Sega - Synthetic Drive", "Full", True, ".md"),
+	("Sony - Synthetic Station", "1G1R Primary", False, ".bin")
+]
+otherFolderNames = ["Hacks", "Homebrew", "Translations"]
+ignoredFolderName = "Hacks"
+skippedDeviceFolderName = "Steam"
+
+titleWords = [
+	"Super", "Mega", "Ultra", "Star", "Dragon", "Quest", "Racer", "Soccer", "Puzzle", "Castle",
+	"Ninja", "Robot", "Space", "Dungeon", "Legend", "Island", "Turbo", "Pinball", "Tennis", "Golf",
+	"Kart", "Hero", "Shadow", "Crystal", "Thunder", "Galaxy", "Monster", "Pirate", "Jungle", "Zero"
+]
+# (region, No-Intro zone)
+regionZones = [
+	("USA", "U"), ("Europe", "E"), ("Japan", "J"), ("USA, Europe", "U"), ("World", "U"),
+	("Germany", "G"), ("France", "F"), ("Spain", "S"), ("Australia", "A"), ("Korea", "K")
+]
+# attributes that some clones have on top of their region
+cloneExtras = ["(Rev 1)", "(Rev 2)", "(Beta)", "(Proto)", "(Demo)", "(En,Fr,De)", "(Virtual Console)", "(Unl)"]
+redumpCategories = ["Games"]*16+["Demos", "Applications", "Bonus Discs", "Coverdiscs"]
+
+"""
+	A synthetic collection: database files, romsets, Other folders and a device, all inside one folder, along with the settings and device profile that describe them.
+
+	Parameters
+	----------
+	baseFolder : str
+		The folder that everything is created in.
+	numGames : int
+		The number of games, split evenly between the systems in syntheticSystems.
+	seed : int
+		The seed of the random number generator; the same seed always generates the same collection.
+	missingRate : float
+		The share of clones that are not in the romsets.
+	misnamedRate : float
+		The share of "(Rev 1)" clones that are stored under their old "(Rev A)" names.
+	miscapitalizedRate : float
+		The share of clones that are stored with the wrong capitalization.
+
+	Attributes
+	----------
+	settings : SimpleNamespace
+		Every setting that an Organizer reads, pointing into baseFolder.
+	deviceName : str
+		The name of the device.
+	deviceProfile : str
+		The device profile file.
+	outputFolder : str
+		The device's rom folder.
+	systems : list (tuple)
+		The (system name, romset category) of each romset.
+	otherSystems : list (str)
+		The systems that have Other folders.
+	numGames : int
+		The number of games in all database files.
+	numClones : int
+		The number of clones in all database files.
+	numFiles : int
+		The number of files that were created (romset, Other and device files).
+"""
+class SyntheticCollection:
+	def __init__(self, baseFolder, numGames, seed=0, missingRate=0.02, misnamedRate=0.5, miscapitalizedRate=0.02):
+		self.baseFolder = baseFolder
+		self.rng = random.Random(seed)
+		self.missingRate = missingRate
+		self.misnamedRate = misnamedRate
+		self.miscapitalizedRate = miscapitalizedRate
+		self.settings = SimpleNamespace(
+			romsetFolder=path.join(baseFolder, "Romsets"),
+			otherFolder=path.join(baseFolder, "Other"),
+			updateFromDeviceFolder=path.join(baseFolder, "Update"),
+			noIntroDir=path.join(baseFolder, "No-Intro"),
+			redumpDir=path.join(baseFolder, "Redump"),
+			logFolder=path.join(baseFolder, "Logs"),
+			hashCacheFolder=path.join(baseFolder, "Hash Cache"),
+			profilesFolder=path.join(baseFolder, "Profiles"),
+			numCopyWorkers=4,
+			maxProbesInFlight=16,
+			numHashWorkers=4,
+			numSystemWorkers=1,
+			outputMode="copy"
+		)
+		for settingName in settingNames+["profilesFolder"]:
+			folder = getattr(self.settings, settingName)
+			if isinstance(folder, str):
+				makedirs(folder, exist_ok=True)
+		self.deviceName = "Benchmark"
+		self.outputFolder = path.join(baseFolder, "Device")
+		makedirs(self.outputFolder, exist_ok=True)
+		self.systems = []
+		self.otherSystems = []
+		self.numGames = 0
+		self.numClones = 0
+		self.numFiles = 0
+		for i in range(len(syntheticSystems)):
+			systemName, romsetCategory, isNoIntro, romExt = syntheticSystems[i]
+			numSystemGames = numGames//len(syntheticSystems)+(1 if i < numGames%len(syntheticSystems) else 0)
+			games = self.generateGames(i, numSystemGames, isNoIntro)
+			makedirs(path.join(self.settings.romsetFolder, systemName), exist_ok=True)
+			if isNoIntro:
+				self.writeXmdb(systemName, games)
+				self.writeNoIntroRomset(systemName, games, romExt)
+				self.writeOtherFolders(systemName, numSystemGames, romExt)
+				self.otherSystems.append(systemName)
+			else:
+				self.writeRedumpDat(systemName, games)
+				self.writeRedumpRomset(systemName, games)
+			self.systems.append((systemName, romsetCategory))
+			self.numGames += len(games)
+			self.numClones += sum(len(clones) for biases, clones in games)
+		self.writeDeviceFiles(numGames)
+		self.deviceProfile = path.join(self.settings.profilesFolder, self.deviceName+".txt")
+		self.writeDeviceProfile()
+
+	"""
+		Returns a list of (biases, clones) for each game of a system, where biases is a list of (bias name, zone).
+	"""
+	def generateGames(self, systemNum, numGames, isNoIntro):
+		rng = self.rng
+		games = []
+		for i in range(numGames):
+			title = " ".join(rng.sample(titleWords, rng.randint(1, 3)))+" "+str(systemNum)+"-"+str(i)
+			if i%50 == 0:
+				title = "SEGA "+title
+			if isNoIntro:
+				gameRegions = rng.sample(regionZones, rng.randint(1, 3))
+			else:
+				gameRegions = [rng.choice(regionZones)]
+			biases = [(title+" ("+region+")", zone) for region, zone in gameRegions]
+			clones = []
+			for bias, zone in biases:
+				clones.append(bias)
+				if isNoIntro and rng.random() < 0.3:
+					clones.append(bias+" "+rng.choice(cloneExtras))
+			games.append((biases, list(dict.fromkeys(clones))))
+		return games
+
+	def writeXmdb(self, systemName, games):
+		databaseFile = path.join(self.settings.noIntroDir, systemName+" (XMDB) (20240101-000000).xmdb")
+		with open(databaseFile, "w", encoding="utf-8") as f:
+			f.write("<?xml version=\"1.0\"?>\n<xmdb><dat><header/><zoneds>\n")
+			for biases, clones in games:
+				f.write("<zoned>")
+				for bias, zone in biases:
+					f.write("<bias zone=\""+zone+"\" name=\""+xmlEscape(bias)+"\"/>")
+				for clone in clones:
+					f.write("<clone name=\""+xmlEscape(clone)+"\"/>")
+				f.write("</zoned>\n")
+			f.write("</zoneds></dat></xmdb>\n")
+
+	def writeRedumpDat(self, systemName, games):
+		databaseFile = path.join(self.settings.redumpDir, systemName+" - Datfile (1) (2024-01-01 00-00-00).dat")
+		with open(databaseFile, "w", encoding="utf-8") as f:
+			f.write("<?xml version=\"1.0\"?>\n<datafile><header><name>"+xmlEscape(systemName)+"</name></header>\n")
+			for biases, clones in games:
+				gameName = xmlEscape(clones[0])
+				f.write("<game name=\""+gameName+"\"><category>"+self.rng.choice(redumpCategories)+"</category>")
+				f.write("<rom name=\""+gameName+".bin\" size=\"256\"/></game>\n")
+			f.write("</datafile>\n")
+
+	"""
+		Returns the name that a clone is stored under in a romset (which may be misnamed or miscapitalized), or None if the clone is missing.
+	"""
+	def getStoredName(self, clone):
+		rng = self.rng
+		if rng.random() < self.missingRate:
+			return None
+		if clone.endswith("(Rev 1)") and rng.random() < self.misnamedRate:
+			return clone[:-len("(Rev 1)")]+"(Rev A)"
+		if rng.random() < self.miscapitalizedRate:
+			return clone.lower()
+		return clone
+
+	def writeNoIntroRomset(self, systemName, games, romExt):
+		systemFolder = path.join(self.settings.romsetFolder, systemName)
+		for biases, clones in games:
+			for clone in clones:
+				storedName = self.getStoredName(clone)
+				if storedName is None:
+					continue
+				with zipfile.ZipFile(path.join(systemFolder, storedName+".zip"), "w", zipfile.ZIP_DEFLATED) as zf:
+					zf.writestr(storedName+romExt, self.getFileData())
+				self.numFiles += 1
+		# files that aren't in the database file
+		for i in range(max(len(games)//100, 1)):
+			self.writeFile(path.join(systemFolder, "Unknown Game "+str(i)+" (USA).zip"))
+
+	def writeRedumpRomset(self, systemName, games):
+		systemFolder = path.join(self.settings.romsetFolder, systemName)
+		for i in range(len(games)):
+			storedName = self.getStoredName(games[i][1][0])
+			if storedName is None:
+				continue
+			if i%2 == 0:
+				# a zipped disc image and its cue sheet
+				with zipfile.ZipFile(path.join(systemFolder, storedName+".zip"), "w", zipfile.ZIP_DEFLATED) as zf:
+					zf.writestr(storedName+".bin", self.getFileData())
+					zf.writestr(storedName+".cue", "FILE \""+storedName+".bin\" BINARY\n  TRACK 01 MODE2/2352\n    INDEX 01 00:00:00\n")
+			else:
+				with open(path.join(systemFolder, storedName+".chd"), "wb") as f:
+					f.write(self.getFileData())
+			self.numFiles += 1
+
+	def writeOtherFolders(self, systemName, numSystemGames, romExt):
+		for i in range(max(numSystemGames//10, 1)):
+			folderName = otherFolderNames[i%len(otherFolderNames)]
+			subfolder = "Set "+str(i%7) if i%3 == 0 else ""
+			self.writeFile(path.join(self.settings.otherFolder, systemName, folderName, subfolder, "Other File "+str(i)+romExt))
+
+	"""
+		Creates files that only exist on the device (which updateOther copies back to the update folder), including some in a folder that is skipped.
+	"""
+	def writeDeviceFiles(self, numGames):
+		for i in range(max(numGames//50, 1)):
+			systemName = self.otherSystems[i%len(self.otherSystems)] if len(self.otherSystems) > 0 else "Misc"
+			self.writeFile(path.join(self.outputFolder, systemName, "Device Only", "Device File "+str(i)+".sav"))
+			if i%5 == 0:
+				self.writeFile(path.join(self.outputFolder, skippedDeviceFolderName, "Game "+str(i), "data.bin"))
+
+	def writeDeviceProfile(self):
+		with open(self.deviceProfile, "w") as f:
+			f.write(": Romsets\n")
+			for systemName, romsetCategory in self.systems:
+				f.write(systemName+"\n"+romsetCategory+"\n")
+			f.write("\n\n\n: Other\n")
+			for systemName in self.otherSystems:
+				f.write(systemName+"\nTrue\n")
+			f.write("\n\n\n: Ignore\n"+ignoredFolderName+"\n[Japan]\n")
+			f.write("\n\n\n: Primary Regions\n[USA]\n")
+			f.write("\n\n\n: Skipped Folders on Device\n"+skippedDeviceFolderName+"\n")
+
+	def writeFile(self, filePath):
+		makedirs(path.dirname(filePath), exist_ok=True)
+		with open(filePath, "wb") as f:
+			f.write(self.getFileData())
+		self.numFiles += 1
+
+	def getFileData(self):
+		size = self.rng.randint(64, 512)
+		return self.rng.getrandbits(size*8).to_bytes(size, "little")
+
+def xmlEscape(s):
+	return s.replace("&", "&amp;").replace("\"", "&quot;").replace("<", "&lt;").replace(">", "&gt;")
+
+def main():
+	parser = argparse.ArgumentParser(description="Generates a synthetic collection (No-Intro XMDB and Redump DAT files, romsets, Other folders and a device folder).")
+	parser.add_argument("folder", help="the folder to create the collection in")
+	parser.add_argument("--games", type=int, default=1000, help="the number of games (default: 1000)")
+	parser.add_argument("--seed", type=int, default=0, help="the random seed (default: 0)")
+	args = parser.parse_args()
+
+	collection = SyntheticCollection(args.folder, args.games, args.seed)
+	print("Created "+str(collection.numGames)+" games ("+str(collection.numClones)+" clones) and "+str(collection.numFiles)+" files in "+args.folder)
+	print("Device profile: "+collection.deviceProfile)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,313 @@
+import errno
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os import path, makedirs, remove, rmdir, link, symlink, replace, fsync
+from time import perf_counter, sleep
+
+# files are copied to a temporary file with this suffix next to their destination, which is only renamed once the file is complete, so an interrupted copy never leaves a truncated file under the real name
+partialSuffix = ".partial"
+# the ways that files can be put in the output folder; every mode other than "copy" falls back to copying a file if it can't be linked
+outputModes = ["copy", "hardlink", "reflink", "symlink"]
+# errors that mean a file can't be linked at all (for example, because the source and destination are on different drives), rather than a problem with a single file
+unsupportedLinkErrors = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EINVAL, errno.ENOTTY, errno.EOPNOTSUPP, errno.ENOSYS, getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+# the Linux ioctl that clones a file's contents (copy-on-write)
+ficloneRequest = 0x40049409
+
+"""
+	Copies files using a pool of worker threads. Files are submitted one at a time and copied in the background; a file is skipped if its destination already exists.
+
+	Each file is copied to a temporary file (see partialSuffix), which is renamed to the destination once it is complete. A file that fails to copy is tried again (up to maxAttempts times), waiting twice as long before each new attempt.
+
+	Parameters
+	----------
+	numWorkers : int
+		The number of files that are copied at the same time. If this is 1 or less, files are copied as soon as they are submitted, without any threads.
+	maxQueued : int
+		The maximum number of submitted files that are waiting to be copied. submit() blocks while the queue is full. Defaults to 4 times numWorkers.
+	copyFunction : function
+		The function used to copy a single file; it is called with the source and destination paths. Defaults to shutil.copy.
+	onCopied : function
+		Optional. Called with a file's label after it has been copied.
+	onProgress : function
+		Optional. Called with a file's size after it has been copied, skipped or has failed to copy.
+	onFileDone : function
+		Optional. Called with a file's destination, the error (a string, or None if the file was copied) and the number of attempts, once a file has been copied or has failed its last attempt.
+	maxAttempts : int
+		The number of times that copying a file is attempted before it is counted as failed.
+	retryDelay : float
+		The number of seconds to wait before the second attempt; each later attempt waits twice as long as the one before.
+	syncFiles : bool
+		If True, each file's data is flushed to the destination drive before the file is renamed, so a file under its real name is complete even if the drive is removed right after it is copied.
+	skipExisting : bool
+		If False, files are copied without checking whether their destination exists (for example, when this was already checked while planning).
+	dryRun : bool
+		If True, nothing is read or written; every submitted file is recorded as copied, using the size given to submit().
+"""
+class CopyEngine:
+	def __init__(self, numWorkers=4, maxQueued=None, copyFunction=shutil.copy, onCopied=None, onProgress=None, skipExisting=True, dryRun=False,
+			onFileDone=None, maxAttempts=3, retryDelay=0.5, syncFiles=False):
+		self.numWorkers = max(int(numWorkers), 1)
+		self.copyFunction = copyFunction
+		self.onCopied = onCopied
+		self.onProgress = onProgress
+		self.onFileDone = onFileDone
+		self.maxAttempts = max(int(maxAttempts), 1)
+		self.retryDelay = retryDelay
+		self.syncFiles = syncFiles
+		self.skipExisting = skipExisting
+		self.dryRun = dryRun
+		self.copiedFiles = []
+		self.copiedPaths = []
+		self.failedFiles = []
+		self.copyLatencies = []
+		self.numSkipped = 0
+		self.numRetries = 0
+		self.bytesCopied = 0
+		self.lock = threading.Lock()
+		self.startTime = perf_counter()
+		self.endTime = None
+		if self.numWorkers > 1:
+			self.executor = ThreadPoolExecutor(max_workers=self.numWorkers)
+			self.queueSlots = threading.BoundedSemaphore(maxQueued or self.numWorkers*4)
+		else:
+			self.executor = None
+			self.queueSlots = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.finish()
+
+	"""
+		Copies a file, unless its destination already exists. Any missing destination folders are created.
+
+		Parameters
+		----------
+		oldFile : str
+			The source file.
+		newFile : str
+			The destination file.
+		label : str
+			The name that is added to copiedFiles (or failedFiles) for this file. Defaults to newFile.
+		failedLabel : str
+			The name that is added to failedFiles if this file fails to copy. Defaults to label.
+		size : int
+			Optional. The size of the file, if it is already known.
+	"""
+	def submit(self, oldFile, newFile, label=None, failedLabel=None, size=None):
+		if label is None:
+			label = newFile
+		if failedLabel is None:
+			failedLabel = label
+		if self.executor is None:
+			self.copyFile(oldFile, newFile, label, failedLabel, size)
+			return
+		self.queueSlots.acquire()
+		try:
+			future = self.executor.submit(self.copyFile, oldFile, newFile, label, failedLabel, size)
+		except:
+			self.queueSlots.release()
+			raise
+		future.add_done_callback(lambda f: self.queueSlots.release())
+
+	def copyFile(self, oldFile, newFile, label, failedLabel, size):
+		if self.dryRun:
+			self.fileCopied(label, newFile, size or 0)
+			return
+		if self.skipExisting and path.isfile(newFile):
+			with self.lock:
+				self.numSkipped += 1
+			self.reportProgress(size or 0)
+			return
+		newDir = path.dirname(newFile)
+		tempFile = newFile+partialSuffix
+		startTime = perf_counter()
+		attempts = 0
+		while True:
+			attempts += 1
+			try:
+				makedirs(newDir, exist_ok=True)
+				# a partial file left behind by an earlier attempt (or an interrupted run)
+				removeIfExists(tempFile)
+				self.copyFunction(oldFile, tempFile)
+				if self.syncFiles and not path.islink(tempFile):
+					syncFile(tempFile)
+				replace(tempFile, newFile)
+				fileSize = path.getsize(newFile)
+				break
+			except Exception as e:
+				error = str(e) or type(e).__name__
+				removeIfExists(tempFile)
+				if attempts < self.maxAttempts and path.isfile(oldFile):
+					with self.lock:
+						self.numRetries += 1
+					sleep(self.retryDelay*2**(attempts-1))
+					continue
+				print("The following file failed to copy: "+failedLabel)
+				try:
+					rmdir(newDir)
+				except OSError:
+					pass
+				with self.lock:
+					self.failedFiles.append(failedLabel)
+				self.reportProgress(size or 0)
+				if self.onFileDone is not None:
+					self.onFileDone(newFile, error, attempts)
+				return
+		self.fileCopied(label, newFile, fileSize, perf_counter()-startTime)
+		if self.onFileDone is not None:
+			self.onFileDone(newFile, None, attempts)
+
+	def fileCopied(self, label, newFile, fileSize, latency=None):
+		with self.lock:
+			self.copiedFiles.append(label)
+			self.copiedPaths.append(newFile)
+			self.bytesCopied += fileSize
+			if latency is not None:
+				self.copyLatencies.append(latency)
+		if self.onCopied is not None:
+			self.onCopied(label)
+		self.reportProgress(fileSize)
+
+	def reportProgress(self, fileSize):
+		if self.onProgress is not None:
+			self.onProgress(fileSize)
+
+	"""
+		Waits for every submitted file to finish copying.
+	"""
+	def finish(self):
+		if self.executor is not None:
+			self.executor.shutdown(wait=True)
+			self.executor = None
+		if self.endTime is None:
+			self.endTime = perf_counter()
+
+	"""
+		Returns the average copy speed in bytes per second.
+	"""
+	def getThroughput(self):
+		endTime = self.endTime if self.endTime is not None else perf_counter()
+		return self.bytesCopied/max(endTime-self.startTime, 1e-9)
+
+	"""
+		Returns a one-line summary of the copied files and the copy speed.
+	"""
+	def getSummary(self):
+		endTime = self.endTime if self.endTime is not None else perf_counter()
+		summary = ("Copied "+str(len(self.copiedFiles))+" new files ("+formatBytes(self.bytesCopied)+") in "
+			+str(round(endTime-self.startTime, 1))+" seconds ("+formatBytes(self.getThroughput())+"/s).")
+		if self.numRetries > 0:
+			summary += " "+str(self.numRetries)+" copies were retried."
+		if len(self.failedFiles) > 0:
+			summary += " "+str(len(self.failedFiles))+" files failed to copy."
+		return summary
+
+"""
+	A copy function for CopyEngine that creates hard links, reflinks (copy-on-write clones) or symbolic links instead of copies, so no file data is duplicated. If a file can't be linked, it is copied instead; if linking isn't possible at all (for example, because the output folder is on a different drive), every later file is copied without trying to link it first.
+
+	Parameters
+	----------
+	outputMode : str
+		"hardlink", "reflink" or "symlink" (see outputModes). "copy" always copies.
+
+	Attributes
+	----------
+	numLinked : int
+		The number of files that were linked.
+	numCopied : int
+		The number of files that were copied instead.
+"""
+class LinkCopier:
+	def __init__(self, outputMode):
+		if outputMode not in outputModes:
+			raise ValueError("Unknown output mode: "+str(outputMode))
+		self.outputMode = outputMode
+		self.linkFunction = {"hardlink" : hardlinkFile, "reflink" : reflinkFile, "symlink" : symlinkFile}.get(outputMode)
+		self.canLink = self.linkFunction is not None
+		self.numLinked = 0
+		self.numCopied = 0
+		self.lock = threading.Lock()
+
+	def __call__(self, oldFile, newFile):
+		if self.canLink:
+			try:
+				self.linkFunction(oldFile, newFile)
+				with self.lock:
+					self.numLinked += 1
+				return
+			except OSError as e:
+				if e.errno in unsupportedLinkErrors:
+					with self.lock:
+						if self.canLink:
+							print("Files can't be "+getModeVerb(self.outputMode)+" here ("+str(e.strerror)+"); copying them instead.")
+						self.canLink = False
+		shutil.copy(oldFile, newFile)
+		with self.lock:
+			self.numCopied += 1
+
+	def getSummary(self):
+		summary = getModeVerb(self.outputMode).capitalize()+" "+str(self.numLinked)+" files"
+		if self.numCopied > 0:
+			summary += " and copied "+str(self.numCopied)+" files that couldn't be linked"
+		return summary+"."
+
+def removeIfExists(filePath):
+	try:
+		remove(filePath)
+	except OSError:
+		pass
+
+def syncFile(filePath):
+	# fsync needs write access on Windows; a read-only file (such as a hard link to a read-only rom) is left to the OS to flush
+	try:
+		with open(filePath, "rb+" if sys.platform == "win32" else "rb") as f:
+			fsync(f.fileno())
+	except PermissionError:
+		pass
+
+def getModeVerb(outputMode):
+	return {"copy" : "copied", "hardlink" : "hard linked", "reflink" : "reflinked", "symlink" : "symlinked"}[outputMode]
+
+def hardlinkFile(oldFile, newFile):
+	link(oldFile, newFile)
+
+def symlinkFile(oldFile, newFile):
+	symlink(path.abspath(oldFile), newFile)
+
+"""
+	Creates a copy-on-write clone of a file, which shares its data with the original until either of them is changed. This is supported by Btrfs and XFS on Linux and by APFS on macOS; anywhere else, an OSError with errno.EOPNOTSUPP is raised.
+"""
+def reflinkFile(oldFile, newFile):
+	if sys.platform.startswith("linux"):
+		import fcntl
+		with open(oldFile, "rb") as src:
+			try:
+				with open(newFile, "xb") as dst:
+					fcntl.ioctl(dst.fileno(), ficloneRequest, src.fileno())
+			except OSError as e:
+				if e.errno != errno.EEXIST:
+					try:
+						remove(newFile)
+					except OSError:
+						pass
+				raise
+		shutil.copymode(oldFile, newFile)
+	elif sys.platform == "darwin":
+		import ctypes
+		libc = ctypes.CDLL(None, use_errno=True)
+		if libc.clonefile(path.abspath(oldFile).encode(), path.abspath(newFile).encode(), 0) != 0:
+			errorNum = ctypes.get_errno()
+			raise OSError(errorNum, "clonefile failed", newFile)
+	else:
+		raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform", newFile)
+
+def formatBytes(numBytes):
+	for unit in ["B", "KB", "MB", "GB"]:
+		if numBytes < 1024:
+			return str(round(numBytes, 1))+" "+unit
+		numBytes /= 1024
+	return str(round(numBytes, 1))+" TB"
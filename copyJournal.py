@@ -0,0 +1,300 @@
+import json
+import sys
+import threading
+from os import path, remove, fsync, listdir
+from time import perf_counter, strftime
+from uuid import uuid4
+
+from copyPlan import CopyPlan
+
+if sys.platform == "win32":
+	import msvcrt
+else:
+	import fcntl
+
+journalVersion = 1
+# the journal is flushed to disk at least this often (in seconds) while files are being copied
+journalSyncInterval = 1.0
+
+def getJournalPrefix(deviceName):
+	return "Copy Journal - "+deviceName+" - "
+
+"""
+	Returns the path of a new copy journal for a device. Every sync gets its own journal, so syncs to the same device that run at the same time don't overwrite each other's journals.
+
+	Parameters
+	----------
+	logFolder : str
+		The log folder.
+	deviceName : str
+		The name of the device.
+"""
+def getNewJournalFile(logFolder, deviceName):
+	return path.join(logFolder, getJournalPrefix(deviceName)+uuid4().hex+".jsonl")
+
+"""
+	Returns the paths of every copy journal of a device in the log folder, newest first.
+"""
+def getJournalFiles(logFolder, deviceName):
+	prefix = getJournalPrefix(deviceName)
+	try:
+		fileNames = listdir(logFolder)
+	except OSError:
+		return []
+	journalFiles = []
+	for fileName in fileNames:
+		journalId = fileName[len(prefix):-len(".jsonl")]
+		# the name of another device may start with this device's prefix, so the rest of the name must be a journal ID
+		if fileName.startswith(prefix) and fileName.endswith(".jsonl") and len(journalId) == 32 and all(c in "0123456789abcdef" for c in journalId):
+			journalFile = path.join(logFolder, fileName)
+			try:
+				journalFiles.append((path.getmtime(journalFile), journalFile))
+			except OSError:
+				continue
+	return [journalFile for mtime, journalFile in sorted(journalFiles, reverse=True)]
+
+"""
+	Takes an exclusive lock on an open file, which is held until the file is closed (even if the program crashes).
+
+	Parameters
+	----------
+	f : file
+		The open file.
+	wait : bool
+		If True, waits for the lock if another process holds it; otherwise, gives up right away.
+
+	Returns
+	-------
+	bool
+		True if the lock was taken.
+"""
+def lockFile(f, wait=False):
+	try:
+		if sys.platform == "win32":
+			f.seek(0)
+			msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+		else:
+			fcntl.flock(f.fileno(), fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+	except OSError:
+		return False
+	return True
+
+"""
+	A write-ahead journal of a copy plan, stored in the log folder, so that a sync that was interrupted (for example, because the device was unplugged or the program was closed) can be resumed without scanning any romsets again.
+
+	Every planned file is written to the journal before anything is copied, and each file is marked as done (or as failed, with the number of attempts) as soon as it has been copied. The journal is a JSON Lines file, so a record that was cut off by a crash only loses that record. Once every file in the journal has been copied, the journal is removed; files that failed stay in the journal (along with how often they have failed) until they are copied.
+
+	A journal is locked for as long as it is open, so the journal of a sync that is still running (for example, in another window) is never mistaken for an interrupted one.
+
+	Parameters
+	----------
+	journalFile : str
+		The journal file.
+
+	Attributes
+	----------
+	outputFolder : str
+		The device's rom folder that the files are copied to.
+	outputMode : str
+		How the files are put in the device's rom folder (see copyEngine.outputModes).
+	startedAt : str
+		When the sync was started.
+	items : dict
+		Maps the destination of every planned file to its CopyItem.
+	doneFiles : set (str)
+		The destinations of the files that have been copied.
+	failedAttempts : dict
+		Maps the destination of every file that has failed to copy to the number of failed attempts so far.
+"""
+class CopyJournal:
+	def __init__(self, journalFile):
+		self.journalFile = journalFile
+		self.outputFolder = None
+		self.outputMode = "copy"
+		self.startedAt = None
+		self.items = {}
+		self.doneFiles = set()
+		self.failedAttempts = {}
+		self.file = None
+		self.lock = threading.Lock()
+		self.lastSync = perf_counter()
+
+	"""
+		Loads an existing journal and locks it.
+
+		Parameters
+		----------
+		journalFile : str
+			The journal file.
+
+		Returns
+		-------
+		CopyJournal
+			The journal, or None if the file doesn't exist, isn't a journal, or is in use by a sync that is still running.
+	"""
+	@classmethod
+	def load(cls, journalFile):
+		journal = cls(journalFile)
+		try:
+			f = open(journalFile, "a+", encoding="utf-8")
+		except OSError:
+			return None
+		try:
+			if not lockFile(f):
+				f.close()
+				return None
+			f.seek(0)
+			for line in f.read().splitlines():
+				try:
+					journal.readRecord(json.loads(line))
+				except (ValueError, KeyError, TypeError):
+					# a record that was only partly written before a crash
+					continue
+		except OSError:
+			f.close()
+			return None
+		if journal.outputFolder is None:
+			f.close()
+			return None
+		# the journal stays open (and locked) so that more files can be recorded in it
+		journal.file = f
+		return journal
+
+	def readRecord(self, record):
+		recordType = record["type"]
+		if recordType == "start":
+			if record["version"] != journalVersion:
+				return
+			self.outputFolder = record["outputFolder"]
+			self.outputMode = record.get("outputMode", "copy")
+			self.startedAt = record.get("startedAt")
+		elif recordType == "item":
+			group = tuple(record["group"])
+			destination = record["destination"]
+			self.items[destination] = (group, record["source"], destination, record["size"], record["reason"], record["label"], record["failedLabel"])
+		elif recordType == "done":
+			self.doneFiles.add(record["destination"])
+			self.failedAttempts.pop(record["destination"], None)
+		elif recordType == "failed":
+			destination = record["destination"]
+			self.failedAttempts[destination] = self.failedAttempts.get(destination, 0)+record["attempts"]
+
+	"""
+		Starts a new journal for a copy plan, and writes every planned file to it before anything is copied.
+
+		Parameters
+		----------
+		journalFile : str
+			The journal file (see getNewJournalFile()).
+		copyPlan : CopyPlan
+			The files that will be copied.
+		outputFolder : str
+			The device's rom folder.
+		outputMode : str
+			How the files are put in the device's rom folder.
+
+		Returns
+		-------
+		CopyJournal
+			The journal, ready to record copied files.
+	"""
+	@classmethod
+	def create(cls, journalFile, copyPlan, outputFolder, outputMode):
+		journal = cls(journalFile)
+		journal.outputFolder = outputFolder
+		journal.outputMode = outputMode
+		journal.startedAt = strftime("%Y-%m-%d %H:%M:%S")
+		journal.file = open(journalFile, "x", encoding="utf-8")
+		# another program that is looking for interrupted syncs may briefly hold the lock of the new (still empty) journal
+		lockFile(journal.file, wait=True)
+		journal.writeRecord({"type" : "start", "version" : journalVersion, "outputFolder" : outputFolder, "outputMode" : outputMode, "startedAt" : journal.startedAt})
+		for group, items in copyPlan.getBatches():
+			for item in items:
+				journal.items[item.destination] = item
+				journal.writeRecord({"type" : "item", "group" : list(group), "source" : item.source, "destination" : item.destination,
+					"size" : item.size, "reason" : item.reason, "label" : item.label, "failedLabel" : item.failedLabel})
+		journal.sync()
+		return journal
+
+	"""
+		Reopens a journal that was closed, so that more files can be recorded in it.
+	"""
+	def reopen(self):
+		if self.file is None:
+			self.file = open(self.journalFile, "a", encoding="utf-8")
+			lockFile(self.file, wait=True)
+
+	"""
+		Returns a CopyPlan of every file in the journal that hasn't been copied yet, in the order they were planned.
+	"""
+	def getPendingPlan(self):
+		copyPlan = CopyPlan()
+		for destination, item in self.items.items():
+			if destination not in self.doneFiles:
+				copyPlan.addItem(*item)
+		return copyPlan
+
+	def getNumPending(self):
+		return len(self.items)-len(self.doneFiles & self.items.keys())
+
+	def writeRecord(self, record):
+		self.file.write(json.dumps(record, separators=(",", ":"))+"\n")
+
+	def sync(self):
+		self.file.flush()
+		fsync(self.file.fileno())
+		self.lastSync = perf_counter()
+
+	"""
+		Records that a file has been copied (if error is None) or has failed to copy. Can be called from several threads.
+
+		Parameters
+		----------
+		destination : str
+			The destination of the file.
+		error : str
+			Why the file failed to copy, or None if it was copied.
+		attempts : int
+			The number of times that copying the file was attempted.
+	"""
+	def markFile(self, destination, error, attempts):
+		with self.lock:
+			if error is None:
+				self.doneFiles.add(destination)
+				self.failedAttempts.pop(destination, None)
+				self.writeRecord({"type" : "done", "destination" : destination})
+			else:
+				self.failedAttempts[destination] = self.failedAttempts.get(destination, 0)+attempts
+				self.writeRecord({"type" : "failed", "destination" : destination, "attempts" : attempts, "error" : error})
+				self.sync()
+				return
+			if perf_counter()-self.lastSync >= journalSyncInterval:
+				self.sync()
+
+	"""
+		Closes the journal. If every file has been copied, the journal is removed; otherwise it is kept so that the sync can be resumed.
+
+		Returns
+		-------
+		bool
+			True if the journal was removed.
+	"""
+	def close(self):
+		with self.lock:
+			if self.file is not None:
+				self.sync()
+				self.file.close()
+				self.file = None
+			if self.getNumPending() > 0:
+				return False
+			self.discard()
+			return True
+
+	def discard(self):
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+		try:
+			remove(self.journalFile)
+		except OSError:
+			pass
@@ -0,0 +1,106 @@
+import threading
+from collections import namedtuple
+
+from copyEngine import formatBytes
+
+"""
+	A single file that is planned to be copied.
+
+	group : tuple (str)
+		The batch that this file belongs to (for example, ("Romset", "Nintendo - Game Boy")). Files are copied one batch at a time, and each batch gets its own log.
+	source : str
+		The source file.
+	destination : str
+		The destination file.
+	size : int
+		The size of the source file in bytes.
+	reason : str
+		Why the file is copied (for example, "Full", "1G1R" or "Other").
+	label : str
+		The name used for this file in logs.
+	failedLabel : str
+		The name used for this file in logs if it fails to copy.
+"""
+CopyItem = namedtuple("CopyItem", ["group", "source", "destination", "size", "reason", "label", "failedLabel"])
+
+"""
+	A list of every file that will be copied, built before anything is copied so that the total number of files and bytes is known up front.
+"""
+class CopyPlan:
+	def __init__(self):
+		self.groups = {}
+		self.numFiles = 0
+		self.totalBytes = 0
+
+	def __len__(self):
+		return self.numFiles
+
+	"""
+		Adds a file to the plan.
+
+		Parameters
+		----------
+		group : tuple (str)
+			The batch that this file belongs to.
+		source : str
+			The source file.
+		destination : str
+			The destination file.
+		size : int
+			The size of the source file in bytes.
+		reason : str
+			Why the file is copied.
+		label : str
+			The name used for this file in logs. Defaults to destination.
+		failedLabel : str
+			The name used for this file in logs if it fails to copy. Defaults to label.
+	"""
+	def addItem(self, group, source, destination, size, reason, label=None, failedLabel=None):
+		if label is None:
+			label = destination
+		if failedLabel is None:
+			failedLabel = label
+		self.groups.setdefault(group, []).append(CopyItem(group, source, destination, size, reason, label, failedLabel))
+		self.numFiles += 1
+		self.totalBytes += size
+
+	"""
+		Returns a list of (group, items) pairs, in the order that the groups were first added. The items in each group are sorted by destination, so files that go to the same folder are copied together.
+	"""
+	def getBatches(self):
+		return [(group, sorted(items, key=lambda item: item.destination)) for group, items in self.groups.items()]
+
+	def getGroupBytes(self, group):
+		return sum(item.size for item in self.groups.get(group, []))
+
+	def getSummary(self):
+		return str(self.numFiles)+" files ("+formatBytes(self.totalBytes)+")"
+
+"""
+	Prints copy progress based on the number of bytes copied so far, every 5%. Can be updated from several threads.
+
+	Parameters
+	----------
+	totalBytes : int
+		The total number of bytes that will be copied.
+	numFiles : int
+		The total number of files that will be copied.
+"""
+class CopyProgress:
+	def __init__(self, totalBytes, numFiles):
+		self.totalBytes = max(totalBytes, 1)
+		self.numFiles = numFiles
+		self.doneBytes = 0
+		self.doneFiles = 0
+		self.nextProgress = 0.05
+		self.lock = threading.Lock()
+
+	def update(self, numBytes):
+		with self.lock:
+			self.doneBytes += numBytes
+			self.doneFiles += 1
+			currProgress = self.doneBytes/self.totalBytes
+			if currProgress >= self.nextProgress or self.doneFiles == self.numFiles:
+				print(str(round(min(currProgress, 1)*100, 1))+"% - Copied "+formatBytes(self.doneBytes)+" of "+formatBytes(self.totalBytes)
+					+" ("+str(self.doneFiles)+" of "+str(self.numFiles)+" files).")
+				self.nextProgress = currProgress+0.05
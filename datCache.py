@@ -0,0 +1,322 @@
+import hashlib
+import mmap
+import struct
+from collections import namedtuple
+from os import path, stat, replace
+
+from gatelib import createDir
+from datLoader import iterDatGames, DatRom
+from romNames import getBestMergeName
+
+# Increase this whenever the file layout or the way merge names/zones are derived changes, so old compiled files are rebuilt.
+cacheVersion = 3
+cacheMagic = b"RODC"
+compiledFolderName = "Compiled"
+
+# magic, version, isNoIntro, source size, source mtime (ns), source SHA1, number of strings, games, biases, clones and roms
+headerRecord = struct.Struct("<4sHBxQq20sIIIII")
+mtimeOffset = struct.calcsize("<4sHBxQ")
+mtimeRecord = struct.Struct("<q")
+# merge name, category, first bias, first clone, first rom, number of biases, number of clones, number of roms, merge region index
+gameRecord = struct.Struct("<IIIIIHHHBx")
+# name, zone
+biasRecord = struct.Struct("<II")
+# name
+cloneRecord = struct.Struct("<I")
+# name, size, which values are known (bit flags; see romFlags), CRC32, MD5, SHA1
+romRecord = struct.Struct("<IQB4s16s20s3x")
+romFlags = {"size" : 1, "crc" : 2, "md5" : 4, "sha1" : 8}
+stringOffsetRecord = struct.Struct("<I")
+
+"""
+	A single game entry from a compiled database file. Same as datLoader.DatGame, with the following additions:
+
+	mergeName : str
+		The name of the folder that the game's clones are merged into.
+	mergeRegionIndex : int
+		The zone value of the game's most significant bias.
+"""
+CompiledGame = namedtuple("CompiledGame", ["biases", "zones", "clones", "category", "roms", "mergeName", "mergeRegionIndex"])
+
+"""
+	Returns the path of the compiled version of a database file. Compiled files are stored in a "Compiled" folder inside the database file's folder.
+
+	Parameters
+	----------
+	databaseFile : str
+		The database file.
+
+	Returns
+	-------
+	str
+		The path of the compiled file.
+"""
+def getCompiledPath(databaseFile):
+	databaseFile = path.abspath(databaseFile)
+	return path.join(path.dirname(databaseFile), compiledFolderName, path.basename(databaseFile)+".rodc")
+
+def getFileHash(filePath):
+	sha1 = hashlib.sha1()
+	with open(filePath, "rb") as f:
+		for chunk in iter(lambda: f.read(1<<20), b""):
+			sha1.update(chunk)
+	return sha1.digest()
+
+"""
+	Reads the games of a database file, using its compiled version if one exists and is still valid.
+
+	If the compiled file is missing or out of date, the database file is streamed instead, and a new compiled file is written once every game has been read. A compiled file is valid if the database file's size and modification time match the ones stored in it, or (if only the modification time differs) if the database file's hash still matches.
+
+	Parameters
+	----------
+	databaseFile : str
+		The database file.
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+"""
+class DatReader:
+	def __init__(self, databaseFile, isNoIntro):
+		self.databaseFile = databaseFile
+		self.isNoIntro = isNoIntro
+		self.compiledFile = getCompiledPath(databaseFile)
+		self.numGames = None
+		self.progress = 0.0
+
+	"""
+		Returns the fraction (between 0 and 1) of the database that has been read so far.
+	"""
+	def getProgress(self):
+		return self.progress
+
+	def __iter__(self):
+		sourceStat = stat(self.databaseFile)
+		compiled = openCompiledFile(self.compiledFile, self.databaseFile, sourceStat, self.isNoIntro)
+		if compiled is not None:
+			return self.iterCompiled(compiled)
+		return self.iterSource(sourceStat)
+
+	def iterCompiled(self, compiled):
+		try:
+			self.numGames = compiled.numGames
+			for i in range(compiled.numGames):
+				currGame = compiled.getGame(i)
+				self.progress = (i+1)/compiled.numGames
+				yield currGame
+		finally:
+			compiled.close()
+
+	def iterSource(self, sourceStat):
+		datSize = max(sourceStat.st_size, 1)
+		writer = CompiledDatWriter(self.isNoIntro)
+		with open(self.databaseFile, "rb") as datFile:
+			for datGame in iterDatGames(datFile, self.isNoIntro):
+				mergeRegionIndex, mergeName = getBestMergeName(datGame.biases, datGame.zones)
+				currGame = CompiledGame(datGame.biases, datGame.zones, datGame.clones, datGame.category,
+					datGame.roms, mergeName, int(mergeRegionIndex))
+				writer.addGame(currGame)
+				self.progress = datFile.tell()/datSize
+				yield currGame
+		self.numGames = writer.numGames
+		try:
+			writer.write(self.compiledFile, sourceStat, getFileHash(self.databaseFile))
+		except OSError:
+			print("WARNING: Could not write compiled database file "+self.compiledFile)
+
+"""
+	Compiles the games of a database file into a binary file that can be memory-mapped on later runs. Games are packed as they are added, so only the compact records (and one copy of each distinct string) are kept in memory.
+
+	Parameters
+	----------
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+"""
+class CompiledDatWriter:
+	def __init__(self, isNoIntro):
+		self.isNoIntro = isNoIntro
+		self.stringIndexes = {}
+		self.strings = []
+		self.gameBytes = bytearray()
+		self.biasBytes = bytearray()
+		self.cloneBytes = bytearray()
+		self.romBytes = bytearray()
+		self.numGames = 0
+		self.numBiases = 0
+		self.numClones = 0
+		self.numRoms = 0
+
+	def getStringIndex(self, s):
+		if s is None:
+			s = ""
+		i = self.stringIndexes.get(s)
+		if i is None:
+			i = len(self.strings)
+			self.stringIndexes[s] = i
+			self.strings.append(s.encode("utf-8"))
+		return i
+
+	def addGame(self, game):
+		self.gameBytes += gameRecord.pack(self.getStringIndex(game.mergeName), self.getStringIndex(game.category),
+			self.numBiases, self.numClones, self.numRoms, len(game.biases), len(game.clones), len(game.roms), min(game.mergeRegionIndex, 255))
+		for bias, zone in zip(game.biases, game.zones):
+			self.biasBytes += biasRecord.pack(self.getStringIndex(bias), self.getStringIndex(zone))
+		for clone in game.clones:
+			self.cloneBytes += cloneRecord.pack(self.getStringIndex(clone))
+		for rom in game.roms:
+			flags = 0
+			for valueName in romFlags:
+				if getattr(rom, valueName) is not None:
+					flags |= romFlags[valueName]
+			self.romBytes += romRecord.pack(self.getStringIndex(rom.name), rom.size or 0, flags,
+				bytes.fromhex(rom.crc or ""), bytes.fromhex(rom.md5 or ""), bytes.fromhex(rom.sha1 or ""))
+		self.numGames += 1
+		self.numBiases += len(game.biases)
+		self.numClones += len(game.clones)
+		self.numRoms += len(game.roms)
+
+	"""
+		Writes the compiled file. The file is written to a temporary file first, then moved into place.
+
+		Parameters
+		----------
+		compiledFile : str
+			The path of the compiled file.
+		sourceStat : os.stat_result
+			The stat of the database file.
+		sourceHash : bytes
+			The SHA1 digest of the database file.
+	"""
+	def write(self, compiledFile, sourceStat, sourceHash):
+		offsetBytes = bytearray()
+		currOffset = 0
+		for s in self.strings:
+			offsetBytes += stringOffsetRecord.pack(currOffset)
+			currOffset += len(s)
+		offsetBytes += stringOffsetRecord.pack(currOffset)
+		createDir(path.dirname(compiledFile))
+		tempFile = compiledFile+".tmp"
+		with open(tempFile, "wb") as f:
+			f.write(headerRecord.pack(cacheMagic, cacheVersion, self.isNoIntro, sourceStat.st_size, sourceStat.st_mtime_ns,
+				sourceHash, len(self.strings), self.numGames, self.numBiases, self.numClones, self.numRoms))
+			f.write(self.gameBytes)
+			f.write(self.biasBytes)
+			f.write(self.cloneBytes)
+			f.write(self.romBytes)
+			f.write(offsetBytes)
+			f.write(b"".join(self.strings))
+		replace(tempFile, compiledFile)
+
+"""
+	Opens a compiled database file if it exists and matches the given database file.
+
+	Parameters
+	----------
+	compiledFile : str
+		The path of the compiled file.
+	databaseFile : str
+		The database file that was compiled.
+	sourceStat : os.stat_result
+		The current stat of the database file.
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+
+	Returns
+	-------
+	CompiledDat
+		The opened compiled file; if it does not exist or is out of date, return None.
+"""
+def openCompiledFile(compiledFile, databaseFile, sourceStat, isNoIntro):
+	if not path.isfile(compiledFile):
+		return None
+	try:
+		compiled = CompiledDat(compiledFile)
+	except (OSError, ValueError, struct.error):
+		return None
+	if compiled.version != cacheVersion or compiled.isNoIntro != isNoIntro or compiled.sourceSize != sourceStat.st_size:
+		compiled.close()
+		return None
+	if compiled.sourceMtimeNs != sourceStat.st_mtime_ns:
+		if compiled.sourceHash != getFileHash(databaseFile):
+			compiled.close()
+			return None
+		# the database file was touched but not changed; store the new modification time so it isn't hashed again
+		try:
+			with open(compiledFile, "r+b") as f:
+				f.seek(mtimeOffset)
+				f.write(mtimeRecord.pack(sourceStat.st_mtime_ns))
+		except OSError:
+			pass
+	return compiled
+
+"""
+	A memory-mapped compiled database file. Records are only decoded when they are requested.
+
+	Parameters
+	----------
+	compiledFile : str
+		The path of the compiled file.
+"""
+class CompiledDat:
+	def __init__(self, compiledFile):
+		self.file = open(compiledFile, "rb")
+		try:
+			self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			self.file.close()
+			raise
+		(magic, self.version, isNoIntro, self.sourceSize, self.sourceMtimeNs, self.sourceHash,
+			self.numStrings, self.numGames, self.numBiases, self.numClones, self.numRoms) = headerRecord.unpack_from(self.mm, 0)
+		if magic != cacheMagic:
+			self.close()
+			raise ValueError("Not a compiled database file: "+compiledFile)
+		self.isNoIntro = bool(isNoIntro)
+		self.gamesStart = headerRecord.size
+		self.biasesStart = self.gamesStart + self.numGames*gameRecord.size
+		self.clonesStart = self.biasesStart + self.numBiases*biasRecord.size
+		self.romsStart = self.clonesStart + self.numClones*cloneRecord.size
+		self.offsetsStart = self.romsStart + self.numRoms*romRecord.size
+		self.stringsStart = self.offsetsStart + (self.numStrings+1)*stringOffsetRecord.size
+		self.sharedStrings = {}
+
+	def close(self):
+		self.mm.close()
+		self.file.close()
+
+	def __len__(self):
+		return self.numGames
+
+	def getString(self, i):
+		start = stringOffsetRecord.unpack_from(self.mm, self.offsetsStart + i*stringOffsetRecord.size)[0]
+		end = stringOffsetRecord.unpack_from(self.mm, self.offsetsStart + (i+1)*stringOffsetRecord.size)[0]
+		return self.mm[self.stringsStart+start:self.stringsStart+end].decode("utf-8")
+
+	# zones and categories are shared by many records, so they are only decoded once
+	def getSharedString(self, i):
+		s = self.sharedStrings.get(i)
+		if s is None:
+			s = self.getString(i)
+			self.sharedStrings[i] = s
+		return s
+
+	def getGame(self, i):
+		(mergeNameIndex, categoryIndex, firstBias, firstClone, firstRom,
+			numBiases, numClones, numRoms, mergeRegionIndex) = gameRecord.unpack_from(self.mm, self.gamesStart + i*gameRecord.size)
+		biases = []
+		zones = []
+		for j in range(firstBias, firstBias+numBiases):
+			biasIndex, zoneIndex = biasRecord.unpack_from(self.mm, self.biasesStart + j*biasRecord.size)
+			biases.append(self.getString(biasIndex))
+			zones.append(self.getSharedString(zoneIndex))
+		clones = []
+		for j in range(firstClone, firstClone+numClones):
+			clones.append(self.getString(cloneRecord.unpack_from(self.mm, self.clonesStart + j*cloneRecord.size)[0]))
+		roms = tuple(self.getRom(j) for j in range(firstRom, firstRom+numRoms))
+		return CompiledGame(tuple(biases), tuple(zones), tuple(clones),
+			self.getSharedString(categoryIndex), roms, self.getString(mergeNameIndex), mergeRegionIndex)
+
+	def getRom(self, i):
+		nameIndex, size, flags, crc, md5, sha1 = romRecord.unpack_from(self.mm, self.romsStart + i*romRecord.size)
+		return DatRom(self.getString(nameIndex),
+			size if flags & romFlags["size"] else None,
+			crc.hex() if flags & romFlags["crc"] else None,
+			md5.hex() if flags & romFlags["md5"] else None,
+			sha1.hex() if flags & romFlags["sha1"] else None)
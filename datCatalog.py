@@ -0,0 +1,150 @@
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from os import path, scandir
+
+# the variants that some No-Intro databases are published in, as they appear in file names (example: "Nintendo - Nintendo 3DS (Decrypted) (XMDB) (20240101-000000).xmdb")
+noIntroVariants = ["Encrypted", "Decrypted", "BigEndian", "LittleEndian", "WAD"]
+# the largest number of elements read from the start of a database file while looking for the date in its header
+maxHeaderElements = 64
+
+"""
+	A database file in a DatCatalog.
+
+	systemName : str
+		The name of the system, as it appears in the file name.
+	databaseFile : str
+		The database file.
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+	variant : str
+		The variant of a No-Intro database (see noIntroVariants), or an empty string.
+	version : str
+		The date of the database file as a string of digits (YYYYMMDDhhmmss), taken from its file name or, if the file name has no date, from its header; an empty string if neither has a date. Newer database files have greater versions.
+"""
+DatEntry = namedtuple("DatEntry", ["systemName", "databaseFile", "isNoIntro", "variant", "version"])
+
+"""
+	A catalog of the database files in the Redump and No-Intro folders, built with one scan of each folder, so that finding a system's database file is a dictionary lookup. Subfolders (such as the "Compiled" folder of compiled database files) are skipped.
+
+	If there are several database files for the same system (for example, an old one that wasn't deleted after a new one was downloaded), the newest one is used. Redump database files are used before No-Intro ones.
+
+	Parameters
+	----------
+	redumpDir : str
+		The folder of Redump DAT files.
+	noIntroDir : str
+		The folder of No-Intro XMDB files.
+
+	Attributes
+	----------
+	numListings : int
+		The number of folders that were listed.
+"""
+class DatCatalog:
+	def __init__(self, redumpDir, noIntroDir):
+		self.redumpEntries = {}
+		self.noIntroEntries = {}
+		self.numDatabaseFiles = {}
+		self.numListings = 0
+		self.addFolder(redumpDir, False)
+		self.addFolder(noIntroDir, True)
+
+	def addFolder(self, folder, isNoIntro):
+		try:
+			with scandir(folder) as entries:
+				fileNames = [entry.name for entry in entries if entry.is_file()]
+		except OSError:
+			return
+		self.numListings += 1
+		systemEntries = self.noIntroEntries if isNoIntro else self.redumpEntries
+		for fileName in fileNames:
+			datEntry = getDatEntry(folder, fileName, isNoIntro)
+			key = datEntry.systemName.lower()
+			self.numDatabaseFiles[(key, isNoIntro)] = self.numDatabaseFiles.get((key, isNoIntro), 0)+1
+			currEntry = systemEntries.get(key)
+			if currEntry is None or (datEntry.version, fileName) > (currEntry.version, path.basename(currEntry.databaseFile)):
+				systemEntries[key] = datEntry
+
+	"""
+		Returns the database file of a system.
+
+		Parameters
+		----------
+		systemName : str
+			The name of the system (case-insensitive).
+
+		Returns
+		-------
+		DatEntry
+			The newest database file of the system, or None if there isn't one.
+	"""
+	def getEntry(self, systemName):
+		key = systemName.lower()
+		datEntry = self.redumpEntries.get(key)
+		if datEntry is None:
+			datEntry = self.noIntroEntries.get(key)
+		return datEntry
+
+	"""
+		Returns the number of database files in the same folder for the same system as a DatEntry (including the DatEntry itself).
+	"""
+	def getNumDatabaseFiles(self, datEntry):
+		return self.numDatabaseFiles.get((datEntry.systemName.lower(), datEntry.isNoIntro), 0)
+
+"""
+	Returns the DatEntry of a file in the Redump or No-Intro folder. Its system name is the file name up to " - Datfile" (Redump) or " (XMDB)" (No-Intro), without any variant.
+"""
+def getDatEntry(folder, fileName, isNoIntro):
+	databaseFile = path.join(folder, fileName)
+	variant = ""
+	if isNoIntro:
+		systemName = fileName.split(" (XMDB)")[0]
+		for currVariant in noIntroVariants:
+			if " ("+currVariant+")" in systemName:
+				systemName = systemName.replace(" ("+currVariant+")", "")
+				variant = currVariant
+	else:
+		systemName = fileName.split(" - Datfile")[0]
+	version = getFileNameVersion(fileName)
+	if version == "":
+		version = getHeaderVersion(databaseFile)
+	return DatEntry(systemName.strip(), databaseFile, isNoIntro, variant, version)
+
+"""
+	Returns the date of a database file from its file name (for example, "20240101000000" for "... (XMDB) (20240101-000000).xmdb" or "... - Datfile (1234) (2024-01-01 00-00-00).dat"), or an empty string if it has none.
+"""
+def getFileNameVersion(fileName):
+	for attribute in reversed(fileName.replace(")", "(").split("(")[1::2]):
+		version = getVersion(attribute)
+		if version != "":
+			return version
+	return ""
+
+"""
+	Returns the date in the header of a database file (its "date" element, or its "version" element if that is a date), or an empty string if it has none or can't be read. Only the start of the file is read.
+"""
+def getHeaderVersion(databaseFile):
+	try:
+		with open(databaseFile, "rb") as f:
+			for i, (event, elem) in enumerate(ET.iterparse(f, events=("end",))):
+				if elem.tag in ("date", "version"):
+					version = getVersion(elem.text or "")
+					if version != "":
+						return version
+				if elem.tag == "header" or i >= maxHeaderElements:
+					break
+	except (OSError, ET.ParseError):
+		pass
+	return ""
+
+"""
+	Returns a date written with digits and separators (example: "2024-01-01 00-00-00") as a string of 14 digits, or an empty string if it isn't a date.
+"""
+def getVersion(text):
+	text = text.strip()
+	if text == "" or any(not (c.isdigit() or c in "-_:. ") for c in text):
+		return ""
+	digits = "".join(c for c in text if c.isdigit())
+	if len(digits) < 8 or len(digits) > 14:
+		return ""
+	return digits.ljust(14, "0")
@@ -0,0 +1,113 @@
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from romNames import getCloneZone
+
+"""
+	A single game entry from a No-Intro or Redump database file.
+
+	biases : tuple (str)
+		The bias names of the game (for Redump, the name of the game without attributes).
+	zones : tuple (str)
+		The zone of each bias.
+	clones : tuple (str)
+		The names of all clones of the game.
+	category : str
+		The category of the game (always "Games" for No-Intro).
+	roms : tuple (DatRom)
+		The files that make up the game, with their sizes and hashes (empty for No-Intro XMDB files, which don't list them).
+"""
+DatGame = namedtuple("DatGame", ["biases", "zones", "clones", "category", "roms"])
+
+"""
+	A single file of a game, as listed in a database file. Hashes are lowercase hex strings; any value that isn't listed is None.
+
+	name : str
+		The file name.
+	size : int
+		The size of the file in bytes.
+	crc : str
+		The CRC32 of the file.
+	md5 : str
+		The MD5 of the file.
+	sha1 : str
+		The SHA1 of the file.
+"""
+DatRom = namedtuple("DatRom", ["name", "size", "crc", "md5", "sha1"])
+
+"""
+	Yields every game in a No-Intro XMDB or Redump DAT file, one at a time.
+
+	The file is parsed incrementally; each game's element is discarded as soon as its record has been created, so memory use does not grow with the size of the database, and the first game is available before the rest of the file has been read.
+
+	Parameters
+	----------
+	databaseFile : str or file
+		The database file (or a binary file object opened on it).
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+
+	Yields
+	------
+	DatGame
+		The record of the current game.
+"""
+def iterDatGames(databaseFile, isNoIntro):
+	elemStack = []
+	indexStack = []
+	childCounts = [0]
+	for event, elem in ET.iterparse(databaseFile, events=("start", "end")):
+		if event == "start":
+			elemStack.append(elem)
+			indexStack.append(childCounts[-1])
+			childCounts[-1] += 1
+			childCounts.append(0)
+			continue
+		elemStack.pop()
+		elemIndex = indexStack.pop()
+		childCounts.pop()
+		if isNoIntro:
+			# games are the children of root[0][1]
+			isGame = len(indexStack) == 3 and indexStack[1] == 0 and indexStack[2] == 1
+		else:
+			# games are root[1:]
+			isGame = len(indexStack) == 1 and elemIndex > 0
+		if not isGame:
+			continue
+		yield getDatGame(elem, isNoIntro)
+		elem.clear()
+		elemStack[-1].remove(elem)
+
+def getDatGame(elem, isNoIntro):
+	if isNoIntro:
+		biasElems = elem.findall("bias")
+		allBiases = tuple(bias.get("name") for bias in biasElems)
+		allZones = tuple(bias.get("zone") for bias in biasElems)
+		allClones = tuple(clone.get("name") for clone in elem.findall("clone"))
+		category = "Games"
+	else:
+		gameName = elem.get("name")
+		allClones = (gameName,)
+		allBiases = (gameName.split(" (")[0],)
+		allZones = (getCloneZone(gameName),)
+		categoryElem = elem.find("category")
+		category = categoryElem.text if categoryElem is not None else "Games"
+	roms = tuple(getDatRom(romElem) for romElem in elem.findall("rom"))
+	return DatGame(allBiases, allZones, allClones, category, roms)
+
+def getDatRom(romElem):
+	size = romElem.get("size")
+	try:
+		size = int(size)
+	except (TypeError, ValueError):
+		size = None
+	hashes = []
+	for hashName, hashLength in [("crc", 8), ("md5", 32), ("sha1", 40)]:
+		currHash = (romElem.get(hashName) or "").strip().lower()
+		try:
+			assert len(currHash) == hashLength
+			bytes.fromhex(currHash)
+		except (AssertionError, ValueError):
+			currHash = None
+		hashes.append(currHash)
+	return DatRom(romElem.get("name"), size, *hashes)
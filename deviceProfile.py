@@ -0,0 +1,98 @@
+from os import path, stat
+from time import sleep
+
+# loaded profiles, keyed on file; a profile is only parsed again if its file has changed
+loadedProfiles = {}
+
+"""
+	A device profile, parsed from its file in a single pass.
+
+	Parameters
+	----------
+	profileFile : str
+		The device profile file.
+
+	Attributes
+	----------
+	romsetCategories : dict
+		Maps each romset to how it is copied ("Full", "1G1R", "1G1R Primary" or "None").
+	otherCategories : dict
+		Maps each Other folder to whether or not it is copied ("True" or "False").
+	ignoredAttributes : set (str)
+		The names of folders that are skipped when copying.
+	primaryRegions : set (str)
+		The region folders whose contents are copied to the root folder of each system.
+	skippedFolders : set (str)
+		The folders in the device's rom folder that are not copied back to the main drive.
+"""
+class DeviceProfile:
+	def __init__(self, profileFile):
+		self.profileFile = profileFile
+		self.romsetCategories = {}
+		self.otherCategories = {}
+		self.ignoredAttributes = set()
+		self.primaryRegions = set()
+		self.skippedFolders = set()
+		with open(profileFile, "r") as f:
+			lines = [line.strip() for line in f]
+		categorySections = {"Romsets" : self.romsetCategories, "Other" : self.otherCategories}
+		listSections = {"Ignore" : self.ignoredAttributes, "Primary Regions" : self.primaryRegions, "Skipped Folders on Device" : self.skippedFolders}
+		currSection = None
+		i = 0
+		while i < len(lines):
+			currLine = lines[i]
+			i += 1
+			if currLine.startswith(":"):
+				currSection = currLine[1:].strip()
+			elif currSection in categorySections:
+				# each entry is a name, followed by its category on the next line
+				if currLine != "" and i < len(lines):
+					categories = categorySections[currSection]
+					if currLine not in categories:
+						categories[currLine] = lines[i]
+					i += 1
+			elif currSection in listSections:
+				# a list ends at its first blank line
+				if currLine == "":
+					currSection = None
+				else:
+					listSections[currSection].add(currLine)
+
+	"""
+		Returns a device profile, parsing its file only if it hasn't been loaded before (or has changed since).
+
+		Parameters
+		----------
+		profileFile : str
+			The device profile file.
+
+		Returns
+		-------
+		DeviceProfile
+			The device profile.
+	"""
+	@classmethod
+	def load(cls, profileFile):
+		profileKey = path.abspath(profileFile)
+		profileMtime = stat(profileFile).st_mtime_ns
+		loadedProfile = loadedProfiles.get(profileKey)
+		if loadedProfile is None or loadedProfile[0] != profileMtime:
+			loadedProfile = (profileMtime, cls(profileFile))
+			loadedProfiles[profileKey] = loadedProfile
+		return loadedProfile[1]
+
+	def getRomsetCategory(self, currSystemName):
+		romsetCategory = self.romsetCategories.get(currSystemName)
+		if romsetCategory is None:
+			print("WARNING: "+currSystemName+" not found in current profile. Please add it manually.\nDefaulting to None.")
+			sleep(2)
+			return "None"
+		return romsetCategory
+
+	def getOtherCategory(self, currSystemName):
+		otherCategory = self.otherCategories.get(currSystemName)
+		if otherCategory is None:
+			print("WARNING: "+currSystemName+" not found in current profile. Please add it manually.\nDefaulting to False.")
+			sleep(2)
+			return "False"
+		return otherCategory
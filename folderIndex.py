@@ -0,0 +1,79 @@
+from os import path, scandir, sep, stat
+
+"""
+	An index of the file paths in a folder tree, so that checking whether a file exists is a set lookup instead of a stat call. Each top-level subfolder is scanned (with one scandir call per folder) the first time a file inside it is looked up, so subfolders that are never looked up are never scanned.
+
+	Paths are compared with path.normcase(), so lookups are case-insensitive on Windows (like path.isfile()).
+
+	Symbolic links to folders are followed (like path.isfile() does), but each folder they lead to is only scanned once per top-level subfolder, so links that point back up the tree can't cause an endless scan.
+
+	Parameters
+	----------
+	folder : str
+		The folder (example: "D:/Other").
+	recursive : bool
+		If False, only the files directly inside the folder and its top-level subfolders are indexed.
+
+	Attributes
+	----------
+	numScans : int
+		The number of folders that have been scanned so far.
+"""
+class FolderIndex:
+	def __init__(self, folder, recursive=True):
+		self.folder = folder
+		self.recursive = recursive
+		self.subfolders = {}
+		self.numScans = 0
+
+	"""
+		Returns whether or not a file exists in the folder tree.
+
+		Parameters
+		----------
+		relativePath : str
+			The path of the file, relative to the folder (example: "Nintendo - Game Boy/Hacks/Hack.gb").
+	"""
+	def hasFile(self, relativePath):
+		relativePath = path.normcase(path.normpath(relativePath))
+		parts = relativePath.split(sep, 1)
+		subfolder = parts[0] if len(parts) > 1 else ""
+		filePaths = self.subfolders.get(subfolder)
+		if filePaths is None:
+			filePaths = set()
+			if subfolder == "":
+				self.scanFolder(self.folder, "", filePaths, False, None)
+			else:
+				subfolderPath = path.join(self.folder, subfolder)
+				self.scanFolder(subfolderPath, subfolder, filePaths, self.recursive, {getFolderId(subfolderPath)})
+			self.subfolders[subfolder] = filePaths
+		return relativePath in filePaths
+
+	def scanFolder(self, currFolder, currRelativeFolder, filePaths, recursive, visitedLinks):
+		subfolders = []
+		try:
+			with scandir(currFolder) as entries:
+				self.numScans += 1
+				for entry in entries:
+					relativePath = path.normcase(path.join(currRelativeFolder, entry.name))
+					if entry.is_file():
+						filePaths.add(relativePath)
+					elif recursive and entry.is_dir():
+						if entry.is_symlink():
+							folderId = getFolderId(entry.path)
+							if folderId is None or folderId in visitedLinks:
+								continue
+							visitedLinks.add(folderId)
+						subfolders.append((entry.path, relativePath))
+		except OSError:
+			return
+		for subfolder, relativeSubfolder in subfolders:
+			self.scanFolder(subfolder, relativeSubfolder, filePaths, recursive, visitedLinks)
+
+# identifies a folder by its device and inode, which are the same for every path that leads to it
+def getFolderId(folder):
+	try:
+		st = stat(folder)
+	except OSError:
+		return None
+	return st.st_dev, st.st_ino
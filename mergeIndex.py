@@ -0,0 +1,126 @@
+import sys
+
+categoryValues = {
+	"Games" : 0,
+	"Demos" : 1,
+	"Bonus Discs" : 2,
+	"Applications" : 3,
+	"Coverdiscs" : 4
+}
+
+"""
+	A merged game: one output folder and the romset files that are copied into it.
+
+	mergeName : str
+		The name of the game's folder.
+	regionIndex : int
+		The zone value of the game's most significant region.
+	files : list (str)
+		The file names (with extension) of every clone of the game that exists in the romset.
+"""
+class MergeEntry:
+	__slots__ = ("mergeName", "regionIndex", "files")
+
+	def __init__(self, mergeName, regionIndex):
+		self.mergeName = mergeName
+		self.regionIndex = regionIndex
+		self.files = []
+
+"""
+	Everything that is learned about a romset while it is scanned: which files are merged into which game folder, each game's category, and which clones were or weren't found.
+
+	Every lookup (including finding the game that a file was merged into) is a single dict/set lookup. Strings are interned, so a name that appears in several places is only stored once. getMemoryUsage() returns the size of the index; a 100k-clone Redump set stays under 80 MB.
+"""
+class MergeIndex:
+	__slots__ = ("entries", "fileLocations", "categories", "mergedClones", "mergedCloneSet", "unmergedClones")
+
+	def __init__(self):
+		self.entries = {}
+		self.fileLocations = {}
+		self.categories = {}
+		self.mergedClones = []
+		self.mergedCloneSet = set()
+		self.unmergedClones = []
+
+	def __len__(self):
+		return len(self.entries)
+
+	"""
+		Iterates over every MergeEntry, in the order that the games were added.
+	"""
+	def __iter__(self):
+		return iter(self.entries.values())
+
+	"""
+		Adds a file to a game folder, creating the folder's entry if necessary.
+
+		Parameters
+		----------
+		mergeName : str
+			The name of the game's folder.
+		regionIndex : int
+			The zone value of the game's most significant region.
+		fileName : str
+			The file name (with extension).
+	"""
+	def addFile(self, mergeName, regionIndex, fileName):
+		mergeName = sys.intern(mergeName)
+		fileName = sys.intern(fileName)
+		key = (mergeName, regionIndex)
+		entry = self.entries.get(key)
+		if entry is None:
+			entry = MergeEntry(mergeName, regionIndex)
+			self.entries[key] = entry
+		entry.files.append(fileName)
+		self.fileLocations.setdefault(fileName, mergeName)
+
+	"""
+		Returns the name of the game folder that contains the given file, or None if the file has not been merged.
+	"""
+	def getGameLocation(self, fileName):
+		return self.fileLocations.get(fileName)
+
+	"""
+		Sets the category of a game folder. If the folder already has a category, the category with the lowest value in categoryValues is kept (for example, a folder containing both a game and its demo is categorized as Games).
+	"""
+	def setCategory(self, mergeName, category):
+		oldCategory = self.categories.get(mergeName)
+		oldVal = categoryValues.get(oldCategory)
+		newVal = categoryValues.get(category)
+		if oldCategory is None or oldVal is None:
+			self.categories[sys.intern(mergeName)] = sys.intern(category)
+		elif newVal is not None and newVal < oldVal:
+			self.categories[mergeName] = sys.intern(category)
+
+	def getCategory(self, mergeName):
+		return self.categories.get(mergeName)
+
+	def addMergedClone(self, clone):
+		clone = sys.intern(clone)
+		self.mergedClones.append(clone)
+		self.mergedCloneSet.add(clone)
+
+	def addUnmergedClone(self, clone):
+		self.unmergedClones.append(sys.intern(clone))
+
+	def isMerged(self, clone):
+		return clone in self.mergedCloneSet
+
+	"""
+		Returns the approximate number of bytes used by the index (including every string it contains, each counted once).
+	"""
+	def getMemoryUsage(self):
+		seen = set()
+		def sizeOf(obj):
+			if id(obj) in seen:
+				return 0
+			seen.add(id(obj))
+			return sys.getsizeof(obj)
+		total = sum(sizeOf(c) for c in (self.entries, self.fileLocations, self.categories, self.mergedClones, self.mergedCloneSet, self.unmergedClones))
+		for key, entry in self.entries.items():
+			total += sizeOf(key) + sizeOf(entry) + sizeOf(entry.mergeName) + sizeOf(entry.files)
+			total += sum(sizeOf(f) for f in entry.files)
+		total += sum(sizeOf(c) for c in self.categories.values())
+		total += sum(sizeOf(c) for c in self.mergedClones)
+		total += sum(sizeOf(c) for c in self.unmergedClones)
+		return total
@@ -0,0 +1,874 @@
+import io
+import traceback
+import zipfile
+from os import path, listdir, rename, scandir
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from deviceProfile import DeviceProfile
+from gatelib import arrayOverlap, getPathArray, makeChoice, removeEmptyFolders
+from romNames import parseName, isRenamedVersion
+from romScorer import getBestRoms
+from datCache import DatReader
+from datCatalog import DatCatalog
+from romsetIndex import RomsetIndex
+from mergeIndex import MergeIndex
+from copyEngine import CopyEngine, LinkCopier, formatBytes, outputModes, partialSuffix
+from copyPlan import CopyPlan, CopyProgress
+from copyJournal import CopyJournal, getNewJournalFile, getJournalFiles
+from syncManifest import SyncManifest, manifestFileName
+from folderIndex import FolderIndex
+from pathProber import PathProber
+from romVerifier import HashCache, verifyRomset
+from zipRename import renameZipArchive
+from runMetrics import RunMetrics
+
+# the metrics names of things that don't belong to a single romset or Other folder
+manifestMetricsName = "Sync Manifest"
+otherLogMetricsName = "Other Folders"
+# how often (in files) the progress of an Other folder scan is printed
+otherProgressStep = 1000
+
+# the settings that an Organizer reads from the settings file
+settingNames = [
+	"romsetFolder", "otherFolder", "updateFromDeviceFolder", "noIntroDir", "redumpDir", "logFolder",
+	"hashCacheFolder", "numCopyWorkers", "numHashWorkers", "numSystemWorkers", "outputMode", "maxProbesInFlight"
+]
+
+compilationArray = [
+	"2 Games in 1 -", "2 Games in 1! -", "2 Disney Games -", "2 Great Games! -",
+	"2 in 1 -", "2 in 1 Game Pack -", "2-in-1 Fun Pack -", "3 Games in 1 -",
+	"4 Games on One Game Pak", "Double Game!", "Double Pack", "2 Jeux en 1",
+	"Crash Superpack", "Spyro Superpack", "Crash & Spyro Superpack"
+]
+classicNESArray = ["Classic NES Series", "Famicom Mini", "Hudson Best Collection"]
+
+"""
+	The result of scanning a single romset: everything that is needed to plan its copy.
+
+	Parameters
+	----------
+	systemName : str
+		The name of the system.
+	systemFolder : str
+		The romset folder.
+	databaseFile : str
+		The system's database file.
+	isNoIntro : bool
+		True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+"""
+class RomsetScan:
+	def __init__(self, systemName, systemFolder, databaseFile, isNoIntro):
+		self.systemName = systemName
+		self.systemFolder = systemFolder
+		self.databaseFile = databaseFile
+		self.isNoIntro = isNoIntro
+		self.romsetIndex = RomsetIndex(systemFolder)
+		self.mergeIndex = MergeIndex()
+		self.verifyResults = None
+
+	def getRomsetFileSize(self, rom):
+		romsetFile = self.romsetIndex.getFile(rom)
+		if romsetFile is not None:
+			return romsetFile.size
+		return path.getsize(path.join(self.systemFolder, rom))
+
+"""
+	Scans romsets and copies them (and Other folders) to a device. All of the state of a run (the settings, the device profile, the device's rom folder and its sync manifest) is kept in the Organizer, and the state of each romset is kept in its RomsetScan, so several Organizers (or several romsets in one Organizer) can be worked on at the same time, each in its own thread.
+
+	Parameters
+	----------
+	settings : object
+		An object with an attribute for each name in settingNames (for example, the settings module).
+	deviceName : str
+		The name of the device profile.
+	deviceProfile : str
+		The device profile file.
+	outputFolder : str
+		Optional. The device's rom folder; this can also be set later with setOutputFolder().
+	syncManifest : SyncManifest
+		Optional. The sync manifest of the device's rom folder, if it is shared with other Organizers. If this is None, it is loaded from outputFolder.
+"""
+class Organizer:
+	def __init__(self, settings, deviceName, deviceProfile, outputFolder=None, syncManifest=None):
+		for settingName in settingNames:
+			setattr(self, settingName, getattr(settings, settingName))
+		self.deviceName = deviceName
+		self.deviceProfile = deviceProfile
+		self.profile = DeviceProfile.load(deviceProfile)
+		if self.outputMode not in outputModes:
+			print("WARNING: Unknown outputMode \""+str(self.outputMode)+"\" in settings.\nDefaulting to copy.")
+			self.outputMode = "copy"
+		self.metrics = RunMetrics()
+		self.prober = PathProber(self.maxProbesInFlight)
+		self.datCatalog = None
+		self.outputFolder = None
+		self.syncManifest = None
+		if outputFolder is not None:
+			self.setOutputFolder(outputFolder, syncManifest)
+
+	def setOutputFolder(self, outputFolder, syncManifest=None):
+		self.outputFolder = outputFolder
+		self.syncManifest = syncManifest if syncManifest is not None else SyncManifest(outputFolder, self.prober)
+
+	def getSettings(self):
+		return {settingName : getattr(self, settingName) for settingName in settingNames}
+
+	"""
+		Scans a romset: fixes the names of misnamed files, works out which game each file belongs to, and optionally verifies the files against the database file.
+
+		Parameters
+		----------
+		systemName : str
+			The name of the system.
+		databaseFile : str
+			The system's database file.
+		isNoIntro : bool
+			True if the database file is a No-Intro XMDB file; False if it is a Redump DAT file.
+		allowInterruptions : bool
+			If True, the user is asked to correct any database entries that aren't found in the romset.
+		verbose : bool
+			If True, more progress information is printed.
+		verifyHashes : bool
+			Whether or not to verify the romset files against the hashes in the database file.
+
+		Returns
+		-------
+		RomsetScan
+			The scanned romset.
+	"""
+	def scanRomset(self, systemName, databaseFile, isNoIntro, allowInterruptions=True, verbose=False, verifyHashes=False):
+		print("\nScanning romset for "+systemName)
+		metricsName = "Romset - "+systemName
+		with self.metrics.phase(metricsName, "scan"):
+			romsetScan = RomsetScan(systemName, path.join(self.romsetFolder, systemName), databaseFile, isNoIntro)
+			systemFolder = romsetScan.systemFolder
+			romsetIndex = romsetScan.romsetIndex
+			self.metrics.count(metricsName, "listdir")
+			self.metrics.count(metricsName, "stat", len(romsetIndex.files))
+			mergeIndex = romsetScan.mergeIndex
+			skipAll = not allowInterruptions
+			verifyTargets = {}
+			numCurrZoned = 0
+			nextProgress = 0.05
+			with self.metrics.phase(metricsName, "parse"):
+				datGames = DatReader(databaseFile, isNoIntro)
+			for currZoned in self.metrics.timeIterator(datGames, metricsName, "parse"):
+				allClones = currZoned.clones
+				category = currZoned.category
+				for clone in allClones:
+					# if the file exists, but the capitalization is wrong (example: "Sega" instead of "SEGA"), fix it
+					for file in romsetIndex.getCaseMismatches(clone):
+						newFile = clone+romsetIndex.getFile(file).ext
+						currFilePath = path.join(systemFolder, file)
+						newFilePath = path.join(systemFolder, newFile)
+						print("Capitalization fix:")
+						with self.metrics.phase(metricsName, "rename"):
+							if zipfile.is_zipfile(currFilePath):
+								if renameArchiveAndContent(currFilePath, newFilePath, clone):
+									romsetIndex.renameFile(file, newFile)
+							else:
+								rename(currFilePath, newFilePath)
+								romsetIndex.renameFile(file, newFile)
+						self.metrics.count(metricsName, "rename")
+				mergeRegionIndex = currZoned.mergeRegionIndex
+				mergeName = currZoned.mergeName
+				gameCurrLocation = mergeIndex.getGameLocation(mergeName)
+				if gameCurrLocation is not None:
+					print("Attempting to resolve naming conflict for "+mergeName+"\n")
+					mergeName = handleDuplicateName(mergeName, allClones, path.join(systemFolder, gameCurrLocation))
+				allClonesList = list(dict.fromkeys(allClones))
+				for currCloneName in allClonesList:
+					currCloneNameWithExt = currCloneName+romsetIndex.getFileExt(currCloneName)
+					currCloneFile = path.join(systemFolder, currCloneNameWithExt)
+					cloneExists = False
+					if romsetIndex.hasFile(currCloneNameWithExt):
+						cloneExists = True
+					else:
+						print("\nThe following ROM was not found:")
+						print(currCloneName)
+						print("\nAll clones for this game:")
+						for c in allClonesList:
+							print(c)
+						badDumpName = currCloneName+" [b].zip"
+						if "(" in currCloneName and romsetIndex.hasFile(badDumpName) and not mergeIndex.isMerged(path.splitext(badDumpName)[0]):
+							print("Romset contains bad dump of this rom. Skipping.")
+							currWrongName = "SKIP"
+						else:
+							currWrongName = guessOldName(romsetIndex, mergeIndex, currCloneName, allClonesList)
+							if currWrongName is None and skipAll:
+								currWrongName = "SKIP"
+							elif currWrongName is None:
+								recommendations = [f for f in romsetIndex.getTitleMatches(currCloneName) if not mergeIndex.isMerged(path.splitext(f)[0])]
+								cwn = makeChoice("Which ROM in your romset matches the missing ROM? It will be renamed.", recommendations+["OTHER", "SKIP", "SKIP ALL"])
+								if cwn == len(recommendations) + 1:
+									print("Enter the exact name of this ROM file in your romset (with extension if the extension isn\'t ZIP), or type \"SKIP\" (no quotes) to skip this ROM.")
+									currWrongName = input()
+								elif cwn == len(recommendations) + 2:
+									currWrongName = "SKIP"
+								elif cwn == len(recommendations) + 3:
+									currWrongName = "SKIP"
+									skipAll = True
+								else:
+									currWrongName = recommendations[cwn-1]
+							if currWrongName != "SKIP":
+								if path.splitext(currWrongName)[1] == "":
+									currWrongName = currWrongName + ".zip"
+								currWrongClone = path.join(systemFolder, currWrongName)
+						if currWrongName == "SKIP":
+							print()
+						elif romsetIndex.hasFile(currWrongName):
+							currCloneFile = path.splitext(currCloneFile)[0]+path.splitext(currWrongClone)[1]
+							currCloneNameWithExt = path.basename(currCloneFile)
+							with self.metrics.phase(metricsName, "rename"):
+								if zipfile.is_zipfile(currWrongClone):
+									cloneExists = renameArchiveAndContent(currWrongClone, currCloneFile, currCloneName)
+								else:
+									rename(currWrongClone, currCloneFile)
+									cloneExists = True
+								# if the archive couldn't be renamed, it is still in the romset under its old name, and the clone is counted as missing
+								if cloneExists:
+									romsetIndex.renameFile(currWrongName, currCloneNameWithExt)
+							if cloneExists:
+								self.metrics.count(metricsName, "rename")
+						else:
+							print("\nInvalid name. Skipping.")
+					if cloneExists:
+						mergeIndex.addFile(mergeName, mergeRegionIndex, currCloneNameWithExt)
+						mergeIndex.setCategory(mergeName, category)
+						mergeIndex.addMergedClone(currCloneName)
+						# database files only list hashes per game, so only single-clone (Redump) games can be verified
+						if verifyHashes and len(currZoned.roms) > 0 and len(allClonesList) == 1:
+							verifyTargets[currCloneNameWithExt] = (currCloneName, currZoned.roms)
+					else:
+						mergeIndex.addUnmergedClone(currCloneName)
+				if verbose:
+					print("Scanned all versions of "+mergeName)
+				numCurrZoned += 1
+				currProgress = datGames.getProgress()
+				if currProgress >= nextProgress:
+					print(str(round(currProgress*100, 1))+"% - Scanned "+str(numCurrZoned)+" games.")
+					nextProgress = currProgress+0.05
+			print("Finished scanning romset.")
+			if verifyHashes:
+				print("Verifying romset files.")
+				with self.metrics.phase(metricsName, "verify"):
+					hashCache = HashCache(path.join(self.hashCacheFolder, systemName+".json"))
+					romsetScan.verifyResults = verifyRomset(systemFolder, romsetIndex, verifyTargets, hashCache, self.numHashWorkers)
+				print(romsetScan.verifyResults.getSummary())
+			if verbose:
+				print("Merge index size: "+str(mergeIndex.getMemoryUsage()//1024)+" KB")
+			if self.logFolder != "":
+				print("Creating romset log.")
+				with self.metrics.phase(metricsName, "log"):
+					self.createRomsetLog(romsetScan)
+				print("Done.")
+			return romsetScan
+
+	"""
+		Finds the database file for a system, checking the Redump DAT files first. If there are several database files for the system, the newest one is used (see DatCatalog).
+
+		Parameters
+		----------
+		currSystemName : str
+			The name of the system.
+
+		Returns
+		-------
+		tuple
+			The database file (an empty string if it wasn't found) and whether or not it is a No-Intro XMDB file.
+	"""
+	def findDatabaseFile(self, currSystemName):
+		metricsName = "Romset - "+currSystemName
+		with self.metrics.phase(metricsName, "resolve"):
+			# the database folders are only scanned for the first system that is looked up
+			if self.datCatalog is None:
+				self.datCatalog = DatCatalog(self.redumpDir, self.noIntroDir)
+				self.metrics.count(metricsName, "listdir", self.datCatalog.numListings)
+			datEntry = self.datCatalog.getEntry(currSystemName)
+			if datEntry is None:
+				return "", True
+			numDatabaseFiles = self.datCatalog.getNumDatabaseFiles(datEntry)
+			if numDatabaseFiles > 1:
+				print("Found "+str(numDatabaseFiles)+" database files for "+currSystemName+". Using the newest one: "+path.basename(datEntry.databaseFile))
+			return datEntry.databaseFile, datEntry.isNoIntro
+
+	"""
+		Scans several romsets at the same time, each in its own process (up to numSystemWorkers at once), and adds their files to the copy plan.
+
+		Each system's output is collected and printed as a single block once that system is finished, so the output of different systems is never mixed. A system that fails doesn't stop the others; every failure is listed at the end.
+
+		Parameters
+		----------
+		copyPlan : CopyPlan
+			The copy plan that each system's files are added to (in the same order as systemJobs).
+		systemJobs : list (tuple)
+			A (system name, romset category, database file, is No-Intro) tuple for each system.
+		ignoredAttributes : set (str)
+			The ignored attributes from the current profile.
+		primaryRegions : set (str)
+			The primary regions from the current profile.
+		verifyHashes : bool
+			Whether or not romset files are verified against the hashes in the database files.
+	"""
+	def scanRomsetsInParallel(self, copyPlan, systemJobs, ignoredAttributes, primaryRegions, verifyHashes):
+		# only imported when it is needed, since it is slow to import
+		from concurrent.futures import ProcessPoolExecutor, as_completed
+
+		numJobs = len(systemJobs)
+		print("\nScanning "+str(numJobs)+" romsets ("+str(min(self.numSystemWorkers, numJobs))+" at a time).")
+		results = {}
+		with ProcessPoolExecutor(max_workers=min(self.numSystemWorkers, numJobs)) as executor:
+			futures = {}
+			for systemJob in systemJobs:
+				workerJob = (self.getSettings(), self.deviceName, self.deviceProfile, self.outputFolder)+systemJob+(ignoredAttributes, primaryRegions, verifyHashes)
+				futures[executor.submit(scanRomsetInWorker, workerJob)] = systemJob[0]
+			for future in as_completed(futures):
+				currSystemName = futures[future]
+				try:
+					result = future.result()
+				except Exception:
+					result = {"output" : "", "items" : [], "manifestEntry" : None, "metrics" : {}, "error" : traceback.format_exc()}
+				results[currSystemName] = result
+				print("\n=== "+currSystemName+" ("+str(len(results))+" of "+str(numJobs)+" romsets) ===")
+				print(result["output"].rstrip())
+				if result["error"] is not None:
+					print("\nFailed to scan "+currSystemName+":\n"+result["error"].rstrip())
+		failedSystems = []
+		print("\nScan results:")
+		for systemJob in systemJobs:
+			currSystemName = systemJob[0]
+			result = results[currSystemName]
+			if result["error"] is not None:
+				failedSystems.append(currSystemName)
+				print("FAILED - "+currSystemName)
+				continue
+			for item in result["items"]:
+				copyPlan.addItem(*item)
+			if result["manifestEntry"] is not None:
+				self.syncManifest.setSystem(currSystemName, result["manifestEntry"])
+			self.metrics.addSystems(result["metrics"])
+			print(str(len(result["items"]))+" new files ("+formatBytes(sum(item.size for item in result["items"]))+") - "+currSystemName)
+		if len(failedSystems) > 0:
+			print("\n"+str(len(failedSystems))+" romsets could not be scanned and will be skipped.")
+
+	def copyRomset(self, romsetScan, romsetCategory, ignoredAttributes, primaryRegions, dryRun=False, outputMode=None):
+		copyPlan = CopyPlan()
+		self.planRomset(copyPlan, romsetScan, romsetCategory, ignoredAttributes, primaryRegions)
+		self.executeCopyPlan(copyPlan, dryRun, outputMode)
+
+	def planRomset(self, copyPlan, romsetScan, romsetCategory, ignoredAttributes, primaryRegions):
+		if romsetCategory not in ["Full", "1G1R", "1G1R Primary"]:
+			return
+		metricsName = "Romset - "+romsetScan.systemName
+		with self.metrics.phase(metricsName, "plan"):
+			systemName = romsetScan.systemName
+			systemFolder = romsetScan.systemFolder
+			mergeIndex = romsetScan.mergeIndex
+			print("\nPlanning romset copy for "+systemName+".")
+			group = ("Romset", systemName)
+			numPlannedFiles = len(copyPlan)
+			numGames = len(mergeIndex)
+			step = max(numGames//20, 1)
+			currGameNum = 0
+			# files are only checked on the device once every game has been planned, so the checks can be made at the same time
+			candidates = []
+			bestRoms = getBestRoms(mergeEntry.files for mergeEntry in mergeIndex)
+			for mergeEntry, bestRom in zip(mergeIndex, bestRoms):
+				gameName = mergeEntry.mergeName
+				gameRegionNum = mergeEntry.regionIndex
+				currGame = mergeEntry.files
+				flags = parseName(bestRom).flags
+				if gameName.startswith("[BIOS]"):
+					gameRegion = "[BIOS]"
+				elif "Test Program" in flags:
+					gameRegion = "[Test Program]"
+				elif gameRegionNum == 0:
+					gameRegion = "[USA]"
+				elif gameRegionNum == 2:
+					gameRegion = "[Europe]"
+				elif gameRegionNum in [1,3,4]:
+					gameRegion = "[Other (English)]"
+				elif gameRegionNum == 5:
+					gameRegion = "[Japan]"
+				else:
+					gameRegion = "[Other (non-English)]"
+				if gameRegion in primaryRegions:
+					gameRegion = ""
+				unlicensedStr = "[Unlicensed]" if "Unl" in flags else ""
+				unreleasedStr = "[Unreleased]" if "Proto" in flags else ""
+				compilationStr = "[Compilations]" if (systemName == "Nintendo - Game Boy Advance" and any([gameName.startswith(comp) for comp in compilationArray])) else ""
+				classicNESStr = "[NES & Famicom]" if (systemName == "Nintendo - Game Boy Advance" and any([gameName.startswith(nes) for nes in classicNESArray])) else ""
+				gbaVideoStr = "[GBA Video]" if gameName.startswith("Game Boy Advance Video") else ""
+				demoStr = "[Demos]" if "Sample" in flags or "Demo" in flags else ""
+				redumpCategory = mergeIndex.getCategory(gameName)
+				if redumpCategory == "Games":
+					redumpCategory = ""
+				else:
+					if redumpCategory in [unlicensedStr, unreleasedStr, compilationStr, classicNESStr, gbaVideoStr, demoStr]:
+						redumpCategory = ""
+					else:
+						redumpCategory = "["+redumpCategory+"]"
+				if romsetCategory == "Full":
+					for rom in currGame:
+						oldFile = path.join(systemFolder, rom)
+						newDir = path.join(self.outputFolder, systemName, gameRegion, compilationStr, classicNESStr, gbaVideoStr, unlicensedStr, demoStr, redumpCategory, unreleasedStr, gameName)
+						newDirPathArray = getPathArray(newDir)
+						if arrayOverlap(ignoredAttributes, newDirPathArray):
+							continue
+						candidates.append((oldFile, path.join(newDir, rom), rom))
+				elif romsetCategory == "1G1R" or gameRegion == "":
+					oldFile = path.join(systemFolder, bestRom)
+					newDir = path.join(self.outputFolder, systemName, gameRegion, compilationStr, classicNESStr, gbaVideoStr, unlicensedStr, unreleasedStr, gameName)
+					newDirPathArray = getPathArray(newDir)
+					if arrayOverlap(ignoredAttributes, newDirPathArray):
+						continue
+					candidates.append((oldFile, path.join(newDir, bestRom), bestRom))
+				currGameNum += 1
+				if currGameNum%step == 0:
+					print(str(round(currGameNum*100.0/numGames, 1))+"% - Confirmed "+str(currGameNum)+" of "+str(numGames)+" game folders.")
+			destinationsExist = self.destinationsExist([newFile for oldFile, newFile, rom in candidates], metricsName)
+			for (oldFile, newFile, rom), destinationExists in zip(candidates, destinationsExist):
+				if not destinationExists:
+					copyPlan.addItem(group, oldFile, newFile, romsetScan.getRomsetFileSize(rom), romsetCategory, rom)
+			print("Found "+str(len(copyPlan)-numPlannedFiles)+" new files ("+formatBytes(copyPlan.getGroupBytes(group))+") to copy.")
+
+	def copyOther(self, systemName, ignoredAttributes, dryRun=False, outputMode=None):
+		copyPlan = CopyPlan()
+		self.planOther(copyPlan, systemName, ignoredAttributes)
+		self.executeCopyPlan(copyPlan, dryRun, outputMode)
+
+	def planOther(self, copyPlan, systemName, ignoredAttributes):
+		metricsName = "Other - "+systemName
+		with self.metrics.phase(metricsName, "plan"):
+			print("\nPlanning Other folder copy for "+systemName+".")
+			group = ("Other", systemName)
+			numPlannedFiles = len(copyPlan)
+			sourceSystemOtherDir = path.join(self.otherFolder, systemName)
+			newSystemDir = path.join(self.outputFolder, systemName)
+			candidates = []
+			# the folders that the system's folder is in are only checked for ignored attributes once; ignored folders inside it are never scanned
+			if not arrayOverlap(ignoredAttributes, getPathArray(sourceSystemOtherDir)):
+				for root, relativeRoot, fileNames in iterFolderTree(sourceSystemOtherDir, ignoredAttributes):
+					self.metrics.count(metricsName, "listdir")
+					newFileDir = path.join(newSystemDir, relativeRoot)
+					for fileName in fileNames:
+						candidates.append((path.join(root, fileName), path.join(newFileDir, fileName)))
+						if len(candidates)%otherProgressStep == 0:
+							print("Confirmed "+str(len(candidates))+" files so far.")
+			destinationsExist = self.destinationsExist([newFile for oldFile, newFile in candidates], metricsName)
+			newCandidates = [candidate for candidate, destinationExists in zip(candidates, destinationsExist) if not destinationExists]
+			self.metrics.count(metricsName, "stat", len(newCandidates))
+			fileSizes = self.prober.getFileSizes([oldFile for oldFile, newFile in newCandidates])
+			for (oldFile, newFile), fileSize in zip(newCandidates, fileSizes):
+				copyPlan.addItem(group, oldFile, newFile, fileSize or 0, "Other", newFile, oldFile)
+			print("Found "+str(len(copyPlan)-numPlannedFiles)+" new files ("+formatBytes(copyPlan.getGroupBytes(group))+") to copy.")
+
+	"""
+		Copies every file in a copy plan to the device, one group at a time, and generates the logs of the copied files.
+
+		Parameters
+		----------
+		copyPlan : CopyPlan
+			The files to copy.
+		dryRun : bool
+			If True, the files are only listed.
+		outputMode : str
+			How files are put in the device's rom folder (see copyEngine.outputModes); files that can't be linked are copied. Defaults to the outputMode setting.
+		copyJournal : CopyJournal
+			Optional. The journal of an interrupted sync that is being resumed. Otherwise, a new journal is started in the log folder (unless there is no log folder).
+	"""
+	def executeCopyPlan(self, copyPlan, dryRun=False, outputMode=None, copyJournal=None):
+		if outputMode is None:
+			outputMode = self.outputMode
+		if len(copyPlan) == 0:
+			return
+		if dryRun:
+			copyJournal = None
+		elif copyJournal is not None:
+			copyJournal.reopen()
+		elif self.logFolder != "":
+			copyJournal = CopyJournal.create(getNewJournalFile(self.logFolder, self.deviceName), copyPlan, self.outputFolder, outputMode)
+		onFileDone = copyJournal.markFile if copyJournal is not None else None
+		if dryRun:
+			print("\nDry run: the following "+copyPlan.getSummary()+" would be copied to "+self.deviceName+".")
+		else:
+			print("\nCopying "+copyPlan.getSummary()+" to "+self.deviceName+".")
+		copyProgress = CopyProgress(copyPlan.totalBytes, len(copyPlan))
+		newOtherFiles = []
+		failedOtherFiles = []
+		# shared by every group, so linking is only given up on once
+		linkCopier = LinkCopier(outputMode)
+		try:
+			for group, items in copyPlan.getBatches():
+				groupType, groupName = group
+				metricsName = groupType+" - "+groupName
+				print("\n"+metricsName)
+				if dryRun:
+					for item in items:
+						print("("+item.reason+") "+item.destination)
+				numLinked = linkCopier.numLinked
+				with self.metrics.phase(metricsName, "copy"):
+					copyEngine = CopyEngine(self.numCopyWorkers, copyFunction=linkCopier, onProgress=copyProgress.update, skipExisting=False, dryRun=dryRun,
+						onFileDone=onFileDone, syncFiles=(copyJournal is not None))
+					for item in items:
+						copyEngine.submit(item.source, item.destination, item.label, item.failedLabel, item.size)
+					copyEngine.finish()
+				if dryRun:
+					continue
+				self.metrics.addCopies(metricsName, copyEngine)
+				if copyEngine.numRetries > 0:
+					self.metrics.count(metricsName, "retry", copyEngine.numRetries)
+				if self.syncManifest is not None:
+					for copiedPath in copyEngine.copiedPaths:
+						self.syncManifest.addFile(copiedPath)
+					self.metrics.count(metricsName, "stat", len(copyEngine.copiedPaths))
+				print(copyEngine.getSummary())
+				if outputMode != "copy":
+					self.metrics.count(metricsName, "link", linkCopier.numLinked-numLinked)
+				if self.logFolder == "":
+					continue
+				if groupType == "Romset":
+					print("Generating New Romset log.")
+					with self.metrics.phase(metricsName, "log"):
+						self.createNewRomsetLog(groupName, copyEngine.copiedFiles, copyEngine.failedFiles)
+				else:
+					newOtherFiles += copyEngine.copiedFiles
+					failedOtherFiles += copyEngine.failedFiles
+		finally:
+			# if copying was interrupted, the journal is kept so the sync can be resumed
+			journalRemoved = copyJournal.close() if copyJournal is not None else True
+		if not journalRemoved:
+			numFailed = len(copyJournal.failedAttempts)
+			print("\n"+str(numFailed)+" files could not be copied (after "+str(sum(copyJournal.failedAttempts.values()))+" attempts in total).")
+			print("They will be tried again if you resume this sync the next time you run the program.")
+		if self.syncManifest is not None and not dryRun:
+			with self.metrics.phase(manifestMetricsName, "save"):
+				self.syncManifest.save()
+		if outputMode != "copy" and not dryRun:
+			print(linkCopier.getSummary())
+		print("Finished copying.")
+		if len(newOtherFiles) > 0 or len(failedOtherFiles) > 0:
+			print("Generating New Other log.")
+			with self.metrics.phase(otherLogMetricsName, "log"):
+				self.createNewFromOtherLog(newOtherFiles, failedOtherFiles)
+			print("Done.")
+
+	"""
+		Returns the journal of the most recent interrupted sync to this device, or None if there isn't one. Journals of syncs that are still running are skipped, and journals with no files left to copy are removed.
+	"""
+	def getInterruptedSync(self):
+		if self.logFolder == "":
+			return None
+		for journalFile in getJournalFiles(self.logFolder, self.deviceName):
+			copyJournal = CopyJournal.load(journalFile)
+			if copyJournal is None:
+				continue
+			if copyJournal.getNumPending() == 0:
+				copyJournal.discard()
+				continue
+			return copyJournal
+		return None
+
+	"""
+		Copies the files of an interrupted sync that haven't been copied yet, to the same rom folder and in the same way as before. No romsets are scanned.
+
+		Parameters
+		----------
+		copyJournal : CopyJournal
+			The journal of the interrupted sync (see getInterruptedSync()).
+	"""
+	def resumeSync(self, copyJournal):
+		self.setOutputFolder(copyJournal.outputFolder)
+		self.executeCopyPlan(copyJournal.getPendingPlan(), outputMode=copyJournal.outputMode, copyJournal=copyJournal)
+
+	def updateOther(self):
+		skippedFoldersOnDevice = self.profile.skippedFolders
+		updateFolderName = path.basename(self.updateFromDeviceFolder)
+		metricsName = "Update - "+updateFolderName
+		print("\nUpdating "+updateFolderName+" folder from "+self.deviceName+".")
+		# whether a file is exclusive to the device is checked against indexes of the romset, Other and update folders, which are each scanned once
+		romsetIndex = FolderIndex(self.romsetFolder, recursive=False)
+		otherIndex = FolderIndex(self.otherFolder)
+		updateIndex = FolderIndex(self.updateFromDeviceFolder)
+		copyEngine = CopyEngine(self.numCopyWorkers, onCopied=lambda f: print("From "+self.deviceName+" to "+updateFolderName+": "+f), skipExisting=False)
+		# files are copied in the background while the device is still being scanned, so the scan phase includes some copying
+		with self.metrics.phase(metricsName, "scan"):
+			deviceTree = self.prober.walk(self.outputFolder, skippedFoldersOnDevice)
+			self.metrics.count(metricsName, "listdir", len(deviceTree))
+			for root, dirs, files in deviceTree:
+				currRoot = root.split(self.outputFolder)[1][1:]
+				try:
+					currSystem = getPathArray(currRoot)[0]
+				except:
+					currSystem = ""
+				for file in files:
+					if (file == manifestFileName and root == self.outputFolder) or file.endswith(partialSuffix):
+						continue
+					fileInOther = path.join(currRoot, file)
+					if romsetIndex.hasFile(path.join(currSystem, file)) or otherIndex.hasFile(fileInOther) or updateIndex.hasFile(fileInOther):
+						continue
+					fileInUpdate = path.join(self.updateFromDeviceFolder, fileInOther)
+					copyEngine.submit(path.join(root, file), fileInUpdate, fileInUpdate, path.join(root, file))
+			self.metrics.count(metricsName, "listdir", romsetIndex.numScans+otherIndex.numScans+updateIndex.numScans)
+		with self.metrics.phase(metricsName, "copy"):
+			copyEngine.finish()
+		self.metrics.addCopies(metricsName, copyEngine)
+		print("\nSuccessfully updated "+updateFolderName+" folder with "+str(len(copyEngine.copiedFiles))+" new files.")
+		print(copyEngine.getSummary())
+		print("\nRemoving empty folders from "+updateFolderName+"...")
+		with self.metrics.phase(metricsName, "cleanup"):
+			removeEmptyFolders(self.updateFromDeviceFolder)
+		print("Done.")
+		if self.logFolder != "":
+			print("Generating New Files In "+updateFolderName+" log.")
+			with self.metrics.phase(metricsName, "log"):
+				self.createNewInOtherLog(copyEngine.copiedFiles, copyEngine.failedFiles)
+			print("Done.")
+
+	"""
+		Writes the metrics of everything this Organizer has done so far to a JSON file in the log folder.
+	"""
+	def saveMetrics(self):
+		if self.logFolder == "":
+			return
+		metricsFile = self.metrics.save(self.logFolder, self.deviceName)
+		print("Saved run metrics as "+metricsFile)
+
+	"""
+		Returns whether or not each of the given files exists on the device. Files that aren't in the sync manifest are checked on the device at the same time (see PathProber).
+
+		Parameters
+		----------
+		newFiles : list (str)
+			The full paths of the files (inside the device's rom folder).
+		metricsName : str
+			The name that the checks are counted under in the run metrics.
+
+		Returns
+		-------
+		list (bool)
+			Whether or not each file exists, in the same order as newFiles.
+	"""
+	def destinationsExist(self, newFiles, metricsName):
+		if self.syncManifest is None:
+			exists = [False]*len(newFiles)
+		else:
+			self.metrics.count(metricsName, "manifestLookup", len(newFiles))
+			exists = [self.syncManifest.hasFile(newFile) for newFile in newFiles]
+		uncheckedIndexes = [i for i in range(len(newFiles)) if not exists[i]]
+		self.metrics.count(metricsName, "stat", len(uncheckedIndexes))
+		for i, fileExists in zip(uncheckedIndexes, self.prober.filesExist([newFiles[i] for i in uncheckedIndexes])):
+			exists[i] = fileExists
+		return exists
+
+	def createRomsetLog(self, romsetScan):
+		systemName = romsetScan.systemName
+		mergedClones = romsetScan.mergeIndex.mergedClones
+		unmergedClones = romsetScan.mergeIndex.unmergedClones
+		verifyResults = romsetScan.verifyResults
+		mergedClones.sort()
+		unmergedClones.sort()
+		romsetLogFile = open(path.join(self.logFolder, "Log - Romset - "+systemName+".txt"), "w", encoding="utf-8", errors="replace")
+		romsetLogFile.writelines("=== "+systemName+" ===\n")
+		numMergedClones = len(mergedClones)
+		numUnmergedClones = len(unmergedClones)
+		romsetLogFile.writelines("=== This romset contains "+str(numMergedClones)+" of "+str(numMergedClones+numUnmergedClones)+" known ROMs ===\n\n")
+		romsetLogFile.writelines("= CONTAINS =\n")
+		for clone in mergedClones:
+			romsetLogFile.writelines(clone+"\n")
+		if len(unmergedClones) > 0:
+			romsetLogFile.writelines("\n= MISSING =\n")
+			for clone in unmergedClones:
+				romsetLogFile.writelines(clone+"\n")
+		if verifyResults is not None:
+			verifyResults.verifiedClones.sort()
+			verifyResults.badClones.sort()
+			verifyResults.unverifiedClones.sort()
+			romsetLogFile.writelines("\n= VERIFIED ("+str(len(verifyResults.verifiedClones))+") =\n")
+			for clone in verifyResults.verifiedClones:
+				romsetLogFile.writelines(clone+"\n")
+			if len(verifyResults.badClones) > 0:
+				romsetLogFile.writelines("\n= BAD DUMPS ("+str(len(verifyResults.badClones))+") =\n")
+				for clone in verifyResults.badClones:
+					romsetLogFile.writelines(clone+"\n")
+			if len(verifyResults.unverifiedClones) > 0:
+				romsetLogFile.writelines("\n= COULD NOT BE VERIFIED ("+str(len(verifyResults.unverifiedClones))+") =\n")
+				for clone in verifyResults.unverifiedClones:
+					romsetLogFile.writelines(clone+"\n")
+		romsetLogFile.close()
+
+	def createNewRomsetLog(self, currSystemName, newOtherFiles, failedRomsetFiles):
+		if len(newOtherFiles) > 0:
+			newOtherFiles.sort()
+			failedRomsetFiles.sort()
+			romsetLogFile = open(path.join(self.logFolder, "Log - Romset (to "+self.deviceName+") - "+currSystemName+".txt"), "w", encoding="utf-8", errors="replace")
+			romsetLogFile.writelines("=== Copied "+str(len(newOtherFiles))+" new ROMs from "+currSystemName+" to "+self.deviceName+" ===\n\n")
+			for file in newOtherFiles:
+				romsetLogFile.writelines(file+"\n")
+			if len(failedRomsetFiles) > 0:
+				romsetLogFile.writelines("\n= FAILED TO COPY =\n")
+				for file in failedRomsetFiles:
+					romsetLogFile.writelines(file+"\n")
+			romsetLogFile.close()
+
+	def createNewFromOtherLog(self, newOtherFiles, failedOtherFiles):
+		updateFolderName = path.basename(self.updateFromDeviceFolder)
+		if len(newOtherFiles) > 0:
+			newOtherFiles.sort()
+			otherLogFile = open(path.join(self.logFolder, "Log - "+updateFolderName+" (to "+self.deviceName+").txt"), "w", encoding="utf-8", errors="replace")
+			otherLogFile.writelines("=== Copied "+str(len(newOtherFiles))+" new files from "+updateFolderName+" to "+self.deviceName+" ===\n\n")
+			for file in newOtherFiles:
+				otherLogFile.writelines(file+"\n")
+			if len(failedOtherFiles) > 0:
+				otherLogFile.writelines("\n= FAILED TO COPY =\n")
+				for file in failedOtherFiles:
+					otherLogFile.writelines(file+"\n")
+			otherLogFile.close()
+
+	def createNewInOtherLog(self, newFilesInOther, failedOtherFiles):
+		updateFolderName = path.basename(self.updateFromDeviceFolder)
+		if len(newFilesInOther):
+			newFilesInOther.sort()
+			otherLogFile = open(path.join(self.logFolder, "Log - "+updateFolderName+" (from "+self.deviceName+").txt"), "w", encoding="utf-8", errors="replace")
+			otherLogFile.writelines("=== Copied "+str(len(newFilesInOther))+" new files from "+self.deviceName+" to "+updateFolderName+" ===\n\n")
+			for file in newFilesInOther:
+				otherLogFile.writelines(file+"\n")
+			if len(failedOtherFiles) > 0:
+				otherLogFile.writelines("\n= FAILED TO COPY =\n")
+				for file in failedOtherFiles:
+					otherLogFile.writelines(file+"\n")
+			otherLogFile.close()
+
+"""
+	Scans and plans a single romset in a worker process, using its own Organizer. Everything that is printed is collected and returned instead, along with the planned files, so the parent process can report it.
+
+	Parameters
+	----------
+	workerJob : tuple
+		The Organizer's settings, device name, device profile and output folder, followed by the system's job from Organizer.scanRomsetsInParallel(), the ignored attributes, the primary regions and whether or not to verify hashes.
+
+	Returns
+	-------
+	dict
+		"output" (str) is everything that was printed, "items" (list) contains the system's planned CopyItems, "manifestEntry" (dict) is the system's entry in the sync manifest, "metrics" (dict) contains the system's SystemMetrics, and "error" (str) is the traceback if the scan failed (otherwise None).
+"""
+def scanRomsetInWorker(workerJob):
+	settings, deviceName, deviceProfile, outputFolder, systemName, romsetCategory, databaseFile, isNoIntro, ignoredAttributes, primaryRegions, verifyHashes = workerJob
+	copyPlan = CopyPlan()
+	output = io.StringIO()
+	manifestEntry = None
+	metrics = {}
+	error = None
+	with redirect_stdout(output):
+		try:
+			organizer = Organizer(SimpleNamespace(**settings), deviceName, deviceProfile, outputFolder)
+			romsetScan = organizer.scanRomset(systemName, databaseFile, isNoIntro, False, verifyHashes=verifyHashes)
+			organizer.planRomset(copyPlan, romsetScan, romsetCategory, ignoredAttributes, primaryRegions)
+			if systemName in organizer.syncManifest.checkedSystems:
+				manifestEntry = organizer.syncManifest.systems.get(systemName)
+			metrics = organizer.metrics.systems
+		except Exception:
+			error = traceback.format_exc()
+	return {"output" : output.getvalue(), "items" : copyPlan.groups.get(("Romset", systemName), []), "manifestEntry" : manifestEntry, "metrics" : metrics, "error" : error}
+
+"""
+	Lists a folder tree with one scandir call per folder, yielding the contents of each folder as soon as it has been scanned. Folders are listed in the same order as os.walk().
+
+	Parameters
+	----------
+	folder : str
+		The top folder.
+	skippedNames : set (str)
+		The names of folders (at any depth) that are not scanned, along with everything inside them.
+
+	Yields
+	------
+	tuple
+		The path of the folder, its path relative to the top folder ("" for the top folder), and the names of the files in it.
+"""
+def iterFolderTree(folder, skippedNames):
+	foldersToScan = [(folder, "")]
+	while len(foldersToScan) > 0:
+		currFolder, relativeFolder = foldersToScan.pop()
+		fileNames = []
+		subfolders = []
+		try:
+			with scandir(currFolder) as entries:
+				for entry in entries:
+					try:
+						isDir = entry.is_dir()
+					except OSError:
+						isDir = False
+					if not isDir:
+						fileNames.append(entry.name)
+					elif entry.name not in skippedNames and not entry.is_symlink():
+						subfolders.append((entry.path, path.join(relativeFolder, entry.name)))
+		except OSError:
+			continue
+		yield currFolder, relativeFolder, fileNames
+		foldersToScan += reversed(subfolders)
+
+def renameArchiveAndContent(currPath, newPath, newName):
+	try:
+		renameZipArchive(currPath, newPath, newName)
+	except (OSError, zipfile.BadZipFile, NotImplementedError) as e:
+		print("\nThis archive could not be renamed ("+str(e)+"). Skipping.")
+		return False
+	print("Renamed "+path.splitext(path.basename(currPath))[0]+" to "+newName+"\n")
+	return True
+
+def handleDuplicateName(mergeName, secondArchiveClones, mergeNameFirstLocation):
+	mergeNameOnly = path.splitext(mergeName)[0]
+	if "[BIOS]" in mergeName: # auto-merge BIOS files
+		return mergeName
+	firstArchiveClones = listdir(mergeNameFirstLocation)
+	firstMatchingRegion = getMatchingRegion(firstArchiveClones)
+	secondMatchingRegion = getMatchingRegion(secondArchiveClones)
+	# rename first archive to region
+	if firstMatchingRegion != "" and secondMatchingRegion == "":
+		newName = mergeNameOnly+" ("+firstMatchingRegion+")"
+		try:
+			rename(mergeNameFirstLocation, path.join(mergedFolder, newName))
+		except:
+			pass
+		return mergeName
+	# rename second archive to region
+	if firstMatchingRegion == "" and secondMatchingRegion != "":
+		newName = mergeNameOnly+" ("+secondMatchingRegion+")"
+		return newName
+	# rename both archives to region
+	if firstMatchingRegion != "" and secondMatchingRegion != "":
+		newName1 = mergeNameOnly+" ("+firstMatchingRegion+")"
+		try:
+			rename(mergeNameFirstLocation, path.join(mergedFolder, newName1))
+		except:
+			pass
+		newName2 = mergeNameOnly+" ("+secondMatchingRegion+")"
+		return newName2
+	# rename neither (merge)
+	return mergeName
+
+"""
+	Returns the first region of the given clones if it is the same for all of them; otherwise (or if a clone has no region), returns an empty string.
+"""
+def getMatchingRegion(clones):
+	matchingRegion = None
+	for clone in clones:
+		regions = parseName(clone).regions
+		if len(regions) == 0 or (matchingRegion is not None and regions[0] != matchingRegion):
+			return ""
+		matchingRegion = regions[0]
+	return matchingRegion if matchingRegion is not None else ""
+
+"""
+	Returns the file in a romset that a missing ROM was most likely renamed from, or None if there isn't one. The file must have the same title as the ROM, must not already be used by another ROM (or be named after another clone of the same game), and its name (without extension) must become the ROM's name when one of its attributes is swapped for an equivalent one (see romNames.renamedAttributePairs). Only files with the same rename key as the ROM are checked.
+"""
+def guessOldName(romsetIndex, mergeIndex, currCloneName, gameClones):
+	for fileName in romsetIndex.getRenameCandidates(currCloneName):
+		if not fileName.startswith(currCloneName.split("(")[0]+"("):
+			continue
+		oldName = path.splitext(fileName)[0]
+		if not mergeIndex.isMerged(oldName) and oldName not in gameClones and isRenamedVersion(oldName, currCloneName):
+			return fileName
+	return None
@@ -0,0 +1,174 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from os import path, scandir
+
+# the largest number of paths that are checked one after the other by a single request
+maxChunkSize = 64
+
+"""
+	Checks many paths at the same time (whether files exist, their sizes, and the contents of folder trees), so that on drives that are slow to answer (USB hubs, network folders) the round trips overlap instead of being paid one at a time. Requests are made by an asyncio event loop through a thread pool, with at most maxInFlight requests in flight (if the prober is used from code that is already running an event loop, the requests are handed to the thread pool directly). Answers are always returned in the same order as the paths they were asked for.
+
+	Paths are split into chunks that are each checked by one request, so checking many paths on a fast drive costs little more than checking them one at a time.
+
+	Parameters
+	----------
+	maxInFlight : int
+		The largest number of requests in flight at the same time. If this is 1, every path is checked in the calling thread.
+"""
+class PathProber:
+	def __init__(self, maxInFlight=16):
+		self.maxInFlight = max(int(maxInFlight), 1)
+
+	"""
+		Returns whether or not each file exists.
+
+		Parameters
+		----------
+		filePaths : list (str)
+			The files to check.
+
+		Returns
+		-------
+		list (bool)
+			Whether or not each file exists, in the same order as filePaths.
+	"""
+	def filesExist(self, filePaths):
+		return self.probe(path.isfile, filePaths)
+
+	"""
+		Returns the size of each file in bytes, or None for a file that can't be read.
+	"""
+	def getFileSizes(self, filePaths):
+		return self.probe(getFileSize, filePaths)
+
+	"""
+		Calls a function on every item of a list, making up to maxInFlight calls at the same time.
+
+		Parameters
+		----------
+		function : function
+			The function to call on each item. It should not raise exceptions.
+		items : list
+			The items.
+
+		Returns
+		-------
+		list
+			The result of each call, in the same order as items.
+	"""
+	def probe(self, function, items):
+		items = list(items)
+		if self.maxInFlight == 1 or len(items) <= 1:
+			return [function(item) for item in items]
+		chunkSize = min(maxChunkSize, -(-len(items)//self.maxInFlight))
+		chunks = [items[i:i+chunkSize] for i in range(0, len(items), chunkSize)]
+		with ThreadPoolExecutor(min(self.maxInFlight, len(chunks))) as executor:
+			if isLoopRunning():
+				# asyncio.run() can't be called while another event loop is running in this thread; the thread pool has at most maxInFlight threads, so it limits the requests in flight by itself
+				chunkResults = list(executor.map(callEach, repeat(function), chunks))
+			else:
+				chunkResults = asyncio.run(self.probeChunks(executor, function, chunks))
+		return [result for results in chunkResults for result in results]
+
+	async def probeChunks(self, executor, function, chunks):
+		loop = asyncio.get_running_loop()
+		inFlight = asyncio.Semaphore(self.maxInFlight)
+		async def probeChunk(chunk):
+			async with inFlight:
+				return await loop.run_in_executor(executor, callEach, function, chunk)
+		return await asyncio.gather(*(probeChunk(chunk) for chunk in chunks))
+
+	"""
+		Lists a folder tree, scanning up to maxInFlight folders at the same time.
+
+		Parameters
+		----------
+		folder : str
+			The top folder.
+		skippedFolders : list (str)
+			Optional. The names of folders (at any depth) that are not scanned. They are also left out of the listed subfolders.
+		withStats : bool
+			If True, each file is listed along with its stat result.
+
+		Returns
+		-------
+		list (tuple)
+			A (root, dirs, files) tuple for each folder in the tree, in the same order as os.walk(). Each item of files is a file name, or a (file name, stat result) pair if withStats is True. Folders that can't be read are left out.
+	"""
+	def walk(self, folder, skippedFolders=(), withStats=False):
+		skippedFolders = set(skippedFolders)
+		listings = {}
+		# the tree is scanned one level at a time, and the folders of each level are scanned at the same time
+		foldersToScan = [folder]
+		while len(foldersToScan) > 0:
+			levelListings = self.probe(lambda currFolder: listFolder(currFolder, skippedFolders, withStats), foldersToScan)
+			nextFoldersToScan = []
+			for currFolder, listing in zip(foldersToScan, levelListings):
+				if listing is not None:
+					listings[currFolder] = listing
+					nextFoldersToScan += listing[2]
+			foldersToScan = nextFoldersToScan
+		tree = []
+		foldersToAdd = [folder]
+		while len(foldersToAdd) > 0:
+			currFolder = foldersToAdd.pop()
+			listing = listings.get(currFolder)
+			if listing is None:
+				continue
+			dirs, files, subfolders = listing
+			tree.append((currFolder, dirs, files))
+			foldersToAdd += reversed(subfolders)
+		return tree
+
+def isLoopRunning():
+	try:
+		asyncio.get_running_loop()
+	except RuntimeError:
+		return False
+	return True
+
+def callEach(function, items):
+	return [function(item) for item in items]
+
+def getFileSize(filePath):
+	try:
+		return path.getsize(filePath)
+	except OSError:
+		return None
+
+"""
+	Lists a single folder like os.walk() does: symbolic links to folders are listed as folders, but aren't scanned.
+
+	Returns
+	-------
+	tuple
+		The names of the folder's subfolders, its files, and the paths of the subfolders to scan; or None if the folder can't be read.
+"""
+def listFolder(folder, skippedFolders, withStats):
+	dirs = []
+	files = []
+	subfolders = []
+	try:
+		with scandir(folder) as entries:
+			for entry in entries:
+				try:
+					isDir = entry.is_dir()
+				except OSError:
+					isDir = False
+				if isDir:
+					if entry.name in skippedFolders:
+						continue
+					dirs.append(entry.name)
+					if not entry.is_symlink():
+						subfolders.append(entry.path)
+				elif withStats:
+					try:
+						files.append((entry.name, entry.stat()))
+					except OSError:
+						continue
+				else:
+					files.append(entry.name)
+	except OSError:
+		return None
+	return dirs, files, subfolders
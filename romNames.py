@@ -0,0 +1,387 @@
+from functools import lru_cache
+
+biasPriority = [
+	"World", "USA", "En", "Europe", "Australia", "Canada", "Japan", "Ja",
+	"France", "Fr", "Germany", "De", "Spain", "Es", "Italy", "It", "Norway",
+	"Brazil", "Sweden", "China", "Zh", "Korea", "Ko", "Asia", "Netherlands",
+	"Russia", "Ru", "Denmark", "Nl", "Pt", "Sv", "No", "Da", "Fi", "Pl",
+	"Unknown"
+]
+zoneBiasValues = {
+	"World" : 0,
+	"U" : 0,
+	"USA" : 0,
+	"En" : 1,
+	"E" : 2,
+	"Europe" : 2,
+	"A" : 3,
+	"Australia" : 3,
+	"Ca" : 4,
+	"Canada" : 4,
+	"J" : 5,
+	"Japan" : 5,
+	"Ja" : 5,
+	"F" : 6,
+	"France" : 6,
+	"Fr" : 6,
+	"G" : 7,
+	"Germany" : 7,
+	"De" : 7,
+	"S" : 8,
+	"Spain" : 8,
+	"Es" : 8,
+	"I" : 9,
+	"Italy" : 9,
+	"It" : 9,
+	"No" : 10,
+	"Norway" : 10,
+	"Br" : 11,
+	"Brazil" : 11,
+	"Sw" : 12,
+	"Sweden" : 12,
+	"Cn" : 13,
+	"China" : 13,
+	"Zh" : 13,
+	"K" : 14,
+	"Korea" : 14,
+	"Ko" : 14,
+	"As" : 15,
+	"Asia" : 15,
+	"Ne" : 16,
+	"Netherlands" : 16,
+	"Ru" : 17,
+	"Russia" : 17,
+	"Da" : 18,
+	"Denmark" : 18,
+	"Nl" : 19,
+	"Pt" : 20,
+	"Sv" : 21,
+	"No" : 22,
+	"Da" : 23,
+	"Fi" : 24,
+	"Pl" : 25
+}
+
+zoneNumToZone = {
+	0 : "U",
+	# 1 : "",
+	2 : "E",
+	3 : "A",
+	4 : "Ca",
+	5 : "J",
+	6 : "F",
+	7 : "G",
+	8 : "S",
+	9 : "I",
+	10 : "No",
+	11 : "Br",
+	12 : "Sw",
+	13 : "Cn",
+	14 : "K",
+	15 : "As",
+	16 : "Ne",
+	17 : "Ru",
+	18 : "Da",
+	19 : "Nl",
+	20 : "Pt",
+	21 : "Sv",
+	22 : "No",
+	23 : "Da",
+	24 : "Fi",
+	25 : "Pl"
+}
+
+# pairs of attributes that name the same release in different versions of the databases (for example, a ROM that was renamed from "(Rev A)" to "(Rev 1)")
+renamedAttributePairs = [
+	("(Rev A)", "(Rev 1)"),
+	("(Rev B)", "(Rev 2)"),
+	("(Rev C)", "(Rev 3)"),
+	("(Rev D)", "(Rev 4)"),
+	("(Rev E)", "(Rev 5)"),
+	("(Rev F)", "(Rev 6)"),
+	("(Beta A)", "(Beta 1)"),
+	("(Beta B)", "(Beta 2)"),
+	("(Beta C)", "(Beta 3)"),
+	("(Beta D)", "(Beta 4)"),
+	("(Beta E)", "(Beta 5)"),
+	("(Beta F)", "(Beta 6)"),
+	("(Proto A)", "(Proto 1)"),
+	("(Proto B)", "(Proto 2)"),
+	("(Proto C)", "(Proto 3)"),
+	("(Proto D)", "(Proto 4)"),
+	("(Proto E)", "(Proto 5)"),
+	("(Proto F)", "(Proto 6)"),
+	("(Rev A)", "(Reprint)"),
+	("(Rev 1)", "(Reprint)"),
+	("(USA, Australia)", "(USA)"),
+	("(USA, Europe)", "(USA)"),
+]
+
+skippedAttributes = [
+	"Rev", "Beta", "Virtual Console", "Proto", "Unl", "v", "Switch Online",
+	"GB Compatible", "SGB Enhanced", "Demo", "Disc", "Promo", "Sample", "DLC",
+	"WiiWare", "GameCube", "Minis", "Promotion Card", "Namcot Collection",
+	"Namco Museum Archives", "Club Nintendo", "Aftermarket", "Test Program",
+	"Competition Cart", "NES Test"
+]
+
+regionNames = {
+	"World", "USA", "Europe", "Australia", "Canada", "Japan", "France", "Germany",
+	"Spain", "Italy", "Norway", "Brazil", "Sweden", "China", "Korea", "Asia",
+	"Netherlands", "Russia", "Denmark", "Finland", "Poland", "Portugal", "Taiwan",
+	"Hong Kong", "UK", "Greece", "Mexico", "Latin America", "Scandinavia", "Unknown"
+}
+languageCodes = {
+	"En", "Ja", "Fr", "De", "Es", "It", "Zh", "Ko", "Ru", "Nl", "Pt", "Sv", "No",
+	"Da", "Fi", "Pl", "Ca", "El", "Tr", "Ar", "He", "Hu", "Cs"
+}
+
+# the number of parsed names that are kept; names are usually parsed again soon after they are first parsed (for example, when a game is scanned and then copied)
+parsedNameCacheSize = 16384
+
+"""
+	A ROM name, split into its parts. The regions, languages, revision and flags are only sorted out the first time one of them is used.
+
+	Parameters
+	----------
+	name : str
+		The full name.
+	attributes : tuple (str)
+		The title, followed by every attribute; lists of attributes (such as "USA, Europe" or "En,Fr") are split into separate attributes.
+
+	Attributes
+	----------
+	title : str
+		The name without any attributes (for example, "Alpha" for "Alpha (USA, Europe) (Rev 1)").
+	regions : tuple (str)
+		The region attributes (for example, ("USA", "Europe")).
+	languages : tuple (str)
+		The language attributes (for example, ("En", "Fr")).
+	revision : str
+		The revision or version attribute (for example, "Rev 1" or "v1.1"), or None.
+	flags : frozenset (str)
+		Every other attribute (for example, "Beta", "Proto" or "Unl").
+"""
+class ParsedName:
+	__slots__ = ("name", "attributes", "_regions", "_languages", "_revision", "_flags")
+
+	def __init__(self, name, attributes):
+		self.name = name
+		self.attributes = attributes
+		self._flags = None
+
+	def __repr__(self):
+		return "ParsedName("+repr(self.name)+")"
+
+	@property
+	def title(self):
+		return self.attributes[0]
+
+	@property
+	def regions(self):
+		self.classifyAttributes()
+		return self._regions
+
+	@property
+	def languages(self):
+		self.classifyAttributes()
+		return self._languages
+
+	@property
+	def revision(self):
+		self.classifyAttributes()
+		return self._revision
+
+	@property
+	def flags(self):
+		self.classifyAttributes()
+		return self._flags
+
+	def classifyAttributes(self):
+		if self._flags is not None:
+			return
+		regions = []
+		languages = []
+		revision = None
+		flags = []
+		for att in self.attributes[1:]:
+			if att in regionNames:
+				regions.append(att)
+			elif att in languageCodes:
+				languages.append(att)
+			elif revision is None and (att.startswith("Rev ") or (att[0] == "v" and att[1:2].isdigit())):
+				revision = att
+			else:
+				flags.append(att)
+		self._regions = tuple(regions)
+		self._languages = tuple(languages)
+		self._revision = revision
+		self._flags = frozenset(flags)
+
+"""
+	Splits a ROM name into its parts. Results are cached, so parsing the same name again is fast.
+
+	Parameters
+	----------
+	name : str
+		The ROM name.
+
+	Returns
+	-------
+	ParsedName
+		The parsed name.
+"""
+@lru_cache(maxsize=parsedNameCacheSize)
+def parseName(name):
+	attributes = []
+	for att in name.replace(")", "(").split("("):
+		att = att.strip()
+		if att == "":
+			continue
+		if len(attributes) > 0 and ("," in att or "+" in att):
+			attributes += [s.strip() for s in att.replace("+", ",").split(",") if s.strip() != ""]
+		else:
+			attributes.append(att)
+	return ParsedName(name, tuple(attributes))
+
+"""
+	Splits a ROM name into its title and attributes.
+
+	Parameters
+	----------
+	name : str
+		The ROM name.
+
+	Returns
+	-------
+	tuple (str)
+		The title, followed by every attribute (see ParsedName.attributes).
+"""
+def getAttributeSplit(name):
+	return parseName(name).attributes
+
+"""
+	Returns the zone of the most significant region in a clone's name, as used by No-Intro biases (for example, "U" for a clone containing "(USA, Europe)").
+
+	Parameters
+	----------
+	clone : str
+		The name of the clone.
+
+	Returns
+	-------
+	str
+		The zone of the clone; if no known region is found, return an empty string.
+"""
+def getCloneZone(clone):
+	bestZoneNum = 99
+	bestZone = ""
+	for att in getAttributeSplit(clone):
+		currZoneNum = zoneBiasValues.get(att)
+		if currZoneNum is not None and currZoneNum < bestZoneNum:
+			bestZoneNum = currZoneNum
+			bestZone = zoneNumToZone.get(bestZoneNum)
+	return bestZone
+
+def getBestMergeName(biases, zones, indexOnly=False):
+	zoneValues = []
+	for zone in zones:
+		currVal = zoneBiasValues.get(zone)
+		if currVal is None:
+			currVal = 99
+		zoneValues.append(currVal)
+	mergeIndex = min(zoneValues)
+	if indexOnly:
+		return mergeIndex, ""
+	mergeName = biases[zoneValues.index(mergeIndex)]
+	mergeNameArray = getAttributeSplit(mergeName)
+	regionIndex = 1
+	for i in range(1, len(mergeNameArray)):
+		if mergeNameArray[i] in biasPriority:
+			mergeName = mergeNameArray[0]
+			for j in range(1,i):
+				mergeName = mergeName + " (" + mergeNameArray[j] + ")"
+			regionIndex = i+1
+			break
+	suffix = ""
+	if len(mergeNameArray) > regionIndex:
+		suffix = getSuffix(mergeNameArray[regionIndex:], mergeName)
+	mergeName = mergeName + suffix
+	mergeName = mergeName.rstrip(".")
+	return mergeIndex, mergeName
+
+def getSuffix(attributes, mergeName):
+	for att in attributes:
+		if att in biasPriority:
+			continue
+		skip = False
+		for skippedAtt in skippedAttributes:
+			if att.startswith(skippedAtt):
+				skip = True
+				break
+		if skip:
+			continue
+		if "Collection" in att:
+			continue
+		if att.count("-") >= 2:
+			continue
+		if not " ("+att+")" in mergeName:
+			return " ("+att+")"
+	return ""
+
+"""
+	Maps every attribute in renamedAttributePairs to one attribute that is shared by all of the attributes that it can be renamed to (for example, "(Rev A)", "(Rev 1)" and "(Reprint)" are all mapped to "(Rev A)").
+"""
+def getRenamedAttributeKeys():
+	attributeKeys = {}
+	for attribute1, attribute2 in renamedAttributePairs:
+		key1 = attributeKeys.get(attribute1, attribute1)
+		key2 = attributeKeys.get(attribute2, attribute2)
+		for attribute in attributeKeys:
+			if attributeKeys[attribute] == key2:
+				attributeKeys[attribute] = key1
+		attributeKeys[attribute1] = key1
+		attributeKeys[attribute2] = key1
+	# attributes that are already their own key don't need to be replaced
+	return {attribute : key for attribute, key in attributeKeys.items() if attribute != key}
+
+renamedAttributeKeys = getRenamedAttributeKeys()
+
+"""
+	Returns a normalized version of a ROM name (without extension) that is the same for every name it could have been renamed from: "&amp;" is unescaped, every renamed attribute (see renamedAttributePairs) is replaced with the same attribute for all attributes that it can be renamed to, and the name is case-folded. Names that are renamed versions of each other always have the same key (though names with the same key aren't always renamed versions of each other; see isRenamedVersion()).
+
+	Parameters
+	----------
+	name : str
+		The ROM name.
+
+	Returns
+	-------
+	str
+		The normalized name.
+"""
+def getRenameKey(name):
+	name = name.replace("&amp;", "&")
+	if "(" in name:
+		for attribute, key in renamedAttributeKeys.items():
+			if attribute in name:
+				name = name.replace(attribute, key)
+	return name.casefold()
+
+"""
+	Returns whether or not a ROM name (without extension) becomes another ROM name when one of the attributes in renamedAttributePairs is swapped for the other one. "&amp;" is unescaped in both names first.
+
+	Parameters
+	----------
+	oldName : str
+		The name of a ROM in the romset.
+	newName : str
+		The name of the ROM in the database.
+"""
+def isRenamedVersion(oldName, newName):
+	oldName = oldName.replace("&amp;", "&")
+	newName = newName.replace("&amp;", "&")
+	for attribute1, attribute2 in renamedAttributePairs:
+		if oldName.replace(attribute1, attribute2) == newName or oldName.replace(attribute2, attribute1) == newName:
+			return True
+	return False
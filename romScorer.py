@@ -0,0 +1,119 @@
+from array import array
+
+from romNames import biasPriority, parseName
+
+# the position of each attribute in biasPriority (lower is more significant); a clone without any of these attributes gets noZoneValue
+biasRanks = {}
+for i in range(len(biasPriority)):
+	biasRanks.setdefault(biasPriority[i], i)
+noZoneValue = 99
+
+# the attributes that change a clone's score; each flag only counts once per clone
+revisionFlag = 1
+versionFlag = 2
+betaFlag = 4
+releaseFlag = 8
+demoFlag = 16
+attributeFlags = {
+	"Rev" : revisionFlag,
+	"Beta" : betaFlag,
+	"Proto" : betaFlag,
+	"Virtual Console" : releaseFlag,
+	"GameCube" : releaseFlag,
+	"Collection" : releaseFlag,
+	"Sample" : demoFlag,
+	"Demo" : demoFlag,
+	"Promo" : demoFlag
+}
+flagScores = {
+	revisionFlag : 30,
+	versionFlag : 30,
+	betaFlag : -50,
+	releaseFlag : -10,
+	demoFlag : -90
+}
+# the score of every combination of flags
+scoresByFlags = [100+sum(flagScores[flag] for flag in flagScores if flags & flag) for flags in range(2*demoFlag)]
+
+"""
+	Returns the zone value and score of a single clone.
+
+	The zone value is the position of the clone's most significant region or language in biasPriority. The score starts at 100, goes up for a revision or version, and goes down for a beta or prototype, a Virtual Console/GameCube/Collection release, or a sample, demo or promo.
+
+	Parameters
+	----------
+	clone : str
+		The clone's file name.
+
+	Returns
+	-------
+	tuple (int)
+		The zone value and the score.
+"""
+def getCloneColumns(clone):
+	parsedName = parseName(clone)
+	zoneValue = noZoneValue
+	for att in parsedName.regions+parsedName.languages:
+		rank = biasRanks.get(att)
+		if rank is not None and rank < zoneValue:
+			zoneValue = rank
+	flags = 0
+	if parsedName.revision is not None and parsedName.revision[0] == "v":
+		flags |= versionFlag
+	for att in parsedName.flags:
+		if att[0] == "v":
+			flags |= versionFlag
+		flags |= attributeFlags.get(att, 0)
+	return zoneValue, scoresByFlags[flags]
+
+"""
+	Picks the best rom of every game in a system at once.
+
+	Every clone is first encoded as a row of columns (zone value and score), with the clones of each game in sorted order and stored next to each other. The winners are then picked in a single pass over the columns: the best rom of a game is the clone with the lowest zone value and, among those, the highest score (the last such clone if there is a tie).
+
+	Parameters
+	----------
+	games : iterable (list (str))
+		The clone file names of each game.
+
+	Returns
+	-------
+	list (str)
+		The best rom of each game, in the same order as the games (None for a game without clones).
+"""
+def getBestRoms(games):
+	sortedClones = []
+	zoneColumn = array("B")
+	scoreColumn = array("h")
+	groupEnds = []
+	for clones in games:
+		for clone in sorted(clones):
+			zoneValue, score = getCloneColumns(clone)
+			sortedClones.append(clone)
+			zoneColumn.append(zoneValue)
+			scoreColumn.append(score)
+		groupEnds.append(len(sortedClones))
+	bestRoms = []
+	groupStart = 0
+	for groupEnd in groupEnds:
+		if groupStart == groupEnd:
+			bestRoms.append(None)
+			continue
+		best = groupStart
+		bestZone = zoneColumn[best]
+		bestScore = scoreColumn[best]
+		for i in range(groupStart+1, groupEnd):
+			zoneValue = zoneColumn[i]
+			if zoneValue < bestZone or (zoneValue == bestZone and scoreColumn[i] >= bestScore):
+				best = i
+				bestZone = zoneValue
+				bestScore = scoreColumn[i]
+		bestRoms.append(sortedClones[best])
+		groupStart = groupEnd
+	return bestRoms
+
+"""
+	Returns the best rom of a single game (see getBestRoms).
+"""
+def getBestRom(clones):
+	return getBestRoms([clones])[0]
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import zipfile
+import zlib
+from os import path, replace
+
+from gatelib import createDir
+
+hashCacheVersion = 1
+# compressed disc images (and archives other than zip); the database only lists the hashes of the files inside them, so they can't be verified
+containerExts = [".7z", ".rar", ".chd", ".cso", ".zso", ".rvz", ".wia", ".gcz", ".wbfs", ".pbp", ".ecm"]
+
+"""
+	Hashes a romset file. If the file is a zip archive, each file inside it is hashed (after decompression); otherwise, the file itself is hashed.
+
+	This is run in worker processes, so it only takes and returns simple values.
+
+	Parameters
+	----------
+	filePath : str
+		The romset file.
+
+	Returns
+	-------
+	dict
+		"archive" (bool) is whether or not the file is a zip archive, and "members" (list) contains a [name, size, crc, md5, sha1] list for each hashed file.
+"""
+def hashRomsetFile(filePath):
+	if zipfile.is_zipfile(filePath):
+		members = []
+		with zipfile.ZipFile(filePath, "r") as zf:
+			for info in zf.infolist():
+				if info.is_dir():
+					continue
+				with zf.open(info) as f:
+					members.append([info.filename]+hashStream(f))
+		return {"archive" : True, "members" : members}
+	with open(filePath, "rb") as f:
+		return {"archive" : False, "members" : [[path.basename(filePath)]+hashStream(f)]}
+
+"""
+	Reads the CRC32 and size of each file in a zip archive from the archive's central directory, without decompressing anything.
+
+	Parameters
+	----------
+	filePath : str
+		The romset file.
+
+	Returns
+	-------
+	dict
+		Same as hashRomsetFile(), except that only the CRC32 of each file is known (the MD5 and SHA1 are None). Returns None if the file is not a zip archive, or if its stored CRCs can't be trusted (encrypted files, or a CRC of 0 for a non-empty file), in which case the file should be fully hashed instead.
+"""
+def readZipDirectory(filePath):
+	members = []
+	try:
+		with zipfile.ZipFile(filePath, "r") as zf:
+			for info in zf.infolist():
+				if info.is_dir():
+					continue
+				if info.flag_bits & 0x1 or (info.CRC == 0 and info.file_size > 0):
+					return None
+				members.append([info.filename, info.file_size, "%08x" % info.CRC, None, None])
+	except (OSError, zipfile.BadZipFile):
+		return None
+	return {"archive" : True, "members" : members}
+
+def hashStream(f):
+	size = 0
+	crc = 0
+	md5 = hashlib.md5()
+	sha1 = hashlib.sha1()
+	for chunk in iter(lambda: f.read(1<<20), b""):
+		size += len(chunk)
+		crc = zlib.crc32(chunk, crc)
+		md5.update(chunk)
+		sha1.update(chunk)
+	return [size, "%08x" % crc, md5.hexdigest(), sha1.hexdigest()]
+
+# zips created by older versions of this program store their contents as "\name"
+def normalizeMemberName(name):
+	return path.basename(name.replace("\\", "/")).casefold()
+
+"""
+	Compares the hashes of a romset file to the files that a database lists for its game.
+
+	Parameters
+	----------
+	roms : tuple (DatRom)
+		The files listed in the database.
+	fileHashes : dict
+		The result of hashRomsetFile() for the romset file.
+
+	Returns
+	-------
+	str
+		None if the romset file can't be verified (the database doesn't list any hashes for this game, or the romset file is a plain file that can't be matched to any of the game's files), an empty string if the romset file matches the database, or the reason it doesn't.
+"""
+def compareHashes(roms, fileHashes):
+	knownRoms = [rom for rom in roms if rom.crc or rom.md5 or rom.sha1]
+	if len(knownRoms) == 0:
+		return None
+	members = fileHashes["members"]
+	membersByName = {normalizeMemberName(m[0]) : m for m in members}
+	if not fileHashes["archive"]:
+		# a plain file is only one of the game's files; only check the file(s) it can be matched to by name, or the game's only file if it has the same extension
+		matchingRoms = [rom for rom in knownRoms if normalizeMemberName(rom.name) in membersByName]
+		if len(matchingRoms) == 0:
+			if len(knownRoms) > 1 or path.splitext(normalizeMemberName(knownRoms[0].name))[1] != path.splitext(normalizeMemberName(members[0][0]))[1]:
+				return None
+			matchingRoms = knownRoms
+		knownRoms = matchingRoms
+	for rom in knownRoms:
+		member = membersByName.get(normalizeMemberName(rom.name))
+		if member is None and len(knownRoms) == 1 and len(members) == 1:
+			member = members[0]
+		if member is None:
+			return "missing "+rom.name
+		memberSize, memberCrc, memberMd5, memberSha1 = member[1:]
+		if rom.size is not None and rom.size != memberSize:
+			return "size mismatch in "+rom.name
+		# use the strongest hash that is known for both (only the CRC32 is known for zips read with readZipDirectory)
+		if rom.sha1 and memberSha1:
+			matches = rom.sha1 == memberSha1
+		elif rom.md5 and memberMd5:
+			matches = rom.md5 == memberMd5
+		else:
+			matches = rom.crc == memberCrc
+		if not matches:
+			return "hash mismatch in "+rom.name
+	return ""
+
+"""
+	A persistent cache of romset file hashes, so files are only hashed again if they have changed. Entries are keyed on file name, size and modification time.
+
+	Parameters
+	----------
+	cacheFile : str
+		The cache file (one per system).
+"""
+class HashCache:
+	def __init__(self, cacheFile):
+		self.cacheFile = cacheFile
+		self.files = {}
+		self.changed = False
+		try:
+			with open(cacheFile, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			if data.get("version") == hashCacheVersion:
+				self.files = data.get("files", {})
+		except (OSError, ValueError):
+			self.files = {}
+
+	def get(self, fileName, size, mtime):
+		entry = self.files.get(fileName)
+		if entry is None or entry[0] != size or entry[1] != mtime:
+			return None
+		return entry[2]
+
+	def set(self, fileName, size, mtime, fileHashes):
+		self.files[fileName] = [size, mtime, fileHashes]
+		self.changed = True
+
+	def save(self):
+		if not self.changed:
+			return
+		createDir(path.dirname(self.cacheFile))
+		tempFile = self.cacheFile+".tmp"
+		try:
+			with open(tempFile, "w", encoding="utf-8") as f:
+				json.dump({"version" : hashCacheVersion, "files" : self.files}, f, separators=(",", ":"))
+			replace(tempFile, self.cacheFile)
+			self.changed = False
+		except OSError:
+			print("WARNING: Could not write hash cache "+self.cacheFile)
+
+"""
+	The result of verifying a romset.
+
+	verifiedClones : list (str)
+		The clones that match the database.
+	badClones : list (str)
+		The clones that don't match the database, with the reason.
+	unverifiedClones : list (str)
+		The clones that couldn't be verified (for example, compressed disc images, or games that the database lists no hashes for).
+	numHashed : int
+		The number of files that were hashed.
+	numCached : int
+		The number of files whose hashes were already in the hash cache.
+	numFromZipDirectory : int
+		The number of zip files that were verified using only their central directory.
+"""
+class VerifyResults:
+	def __init__(self):
+		self.verifiedClones = []
+		self.badClones = []
+		self.unverifiedClones = []
+		self.numHashed = 0
+		self.numCached = 0
+		self.numFromZipDirectory = 0
+
+	def getSummary(self):
+		return ("Verified "+str(len(self.verifiedClones))+" ROMs, found "+str(len(self.badClones))+" bad dumps, could not verify "+str(len(self.unverifiedClones))+" ("
+			+str(self.numFromZipDirectory)+" files checked from zip directories, "+str(self.numHashed)+" files hashed, "+str(self.numCached)+" from cache).")
+
+"""
+	Verifies romset files against the hashes listed in a database file.
+
+	Zip files are checked using the CRC32s and sizes stored in their central directories, so nothing needs to be decompressed. Compressed disc images and other archives (see containerExts) can't be verified, so they aren't hashed. Other files, and zip files whose stored CRCs can't be trusted (or whose database entries don't list a CRC32), are fully hashed in a pool of worker processes. Files that are in the hash cache (and haven't changed) are not read at all.
+
+	Parameters
+	----------
+	systemFolder : str
+		The romset folder.
+	romsetIndex : RomsetIndex
+		The index of the romset folder.
+	targets : dict
+		Maps each romset file name to a (clone name, roms) pair, where roms are the DatRoms listed for the clone.
+	hashCache : HashCache
+		The hash cache for this system.
+	numWorkers : int
+		The number of worker processes. If this is 1 or less, files are hashed in the current process.
+	useZipDirectory : bool
+		If False, zip files are always fully hashed.
+
+	Returns
+	-------
+	VerifyResults
+		The verification results.
+"""
+def verifyRomset(systemFolder, romsetIndex, targets, hashCache, numWorkers=4, useZipDirectory=True):
+	results = VerifyResults()
+	allHashes = {}
+	filesToHash = []
+	for fileName in targets:
+		romsetFile = romsetIndex.getFile(fileName)
+		if romsetFile is None:
+			continue
+		cloneName, roms = targets[fileName]
+		if path.splitext(fileName)[1].lower() in containerExts and not any(normalizeMemberName(rom.name) == normalizeMemberName(fileName) for rom in roms):
+			results.unverifiedClones.append(cloneName)
+			continue
+		cachedHashes = hashCache.get(fileName, romsetFile.size, romsetFile.mtime)
+		if cachedHashes is not None:
+			allHashes[fileName] = cachedHashes
+			results.numCached += 1
+			continue
+		if useZipDirectory and all(rom.crc for rom in roms if rom.md5 or rom.sha1):
+			fileHashes = readZipDirectory(path.join(systemFolder, fileName))
+			if fileHashes is not None:
+				allHashes[fileName] = fileHashes
+				hashCache.set(fileName, romsetFile.size, romsetFile.mtime, fileHashes)
+				results.numFromZipDirectory += 1
+				continue
+		filesToHash.append(romsetFile)
+	if len(filesToHash) > 0:
+		filePaths = [path.join(systemFolder, romsetFile.name) for romsetFile in filesToHash]
+		if numWorkers > 1 and len(filesToHash) > 1:
+			# only imported when it is needed, since it is slow to import
+			from concurrent.futures import ProcessPoolExecutor
+			with ProcessPoolExecutor(max_workers=numWorkers) as executor:
+				futures = [executor.submit(hashRomsetFile, filePath) for filePath in filePaths]
+				hashResults = []
+				for future in futures:
+					try:
+						hashResults.append(future.result())
+					except Exception:
+						hashResults.append(None)
+		else:
+			hashResults = []
+			for filePath in filePaths:
+				try:
+					hashResults.append(hashRomsetFile(filePath))
+				except Exception:
+					hashResults.append(None)
+		for romsetFile, fileHashes in zip(filesToHash, hashResults):
+			results.numHashed += 1
+			allHashes[romsetFile.name] = fileHashes
+			if fileHashes is not None:
+				hashCache.set(romsetFile.name, romsetFile.size, romsetFile.mtime, fileHashes)
+	for fileName, (cloneName, roms) in targets.items():
+		if fileName not in allHashes:
+			continue
+		fileHashes = allHashes[fileName]
+		if fileHashes is None:
+			results.badClones.append(cloneName+" (could not be read)")
+			continue
+		reason = compareHashes(roms, fileHashes)
+		if reason is None:
+			results.unverifiedClones.append(cloneName)
+			continue
+		if reason == "":
+			results.verifiedClones.append(cloneName)
+		else:
+			results.badClones.append(cloneName+" ("+reason+")")
+	hashCache.save()
+	return results
@@ -0,0 +1,124 @@
+from os import path, scandir, stat
+from collections import namedtuple
+
+from romNames import getRenameKey
+
+"""
+	A file in a romset folder.
+
+	name : str
+		The file name (with extension).
+	stem : str
+		The file name without extension.
+	ext : str
+		The file extension (including the ".").
+	size : int
+		The size of the file in bytes.
+	mtime : float
+		The modification time of the file.
+"""
+RomsetFile = namedtuple("RomsetFile", ["name", "stem", "ext", "size", "mtime"])
+
+"""
+	An index of the files in a single romset folder, built with one scan of the folder. Files can be looked up by name, by name without extension, by case-insensitive name without extension, by title (the name up to its first attribute), or by rename key (see romNames.getRenameKey()), so finding the files that a missing ROM might have been renamed from doesn't need a scan of the whole folder.
+
+	Parameters
+	----------
+	folder : str
+		The romset folder (example: "D:/Roms/Nintendo - Game Boy").
+"""
+class RomsetIndex:
+	def __init__(self, folder):
+		self.folder = folder
+		self.files = {}
+		self.stems = {}
+		self.foldedStems = {}
+		self.titles = {}
+		self.renameKeys = {}
+		with scandir(folder) as entries:
+			for entry in entries:
+				if entry.is_file():
+					st = entry.stat()
+					self.addFile(entry.name, st.st_size, st.st_mtime)
+
+	def addFile(self, fileName, size, mtime):
+		stem, ext = path.splitext(fileName)
+		self.files[fileName] = RomsetFile(fileName, stem, ext, size, mtime)
+		self.stems.setdefault(stem, []).append(fileName)
+		self.foldedStems.setdefault(stem.casefold(), []).append(fileName)
+		if "(" in fileName:
+			self.titles.setdefault(fileName.split("(", 1)[0], []).append(fileName)
+		self.renameKeys.setdefault(getRenameKey(stem), []).append(fileName)
+
+	def removeFile(self, fileName):
+		romsetFile = self.files.pop(fileName, None)
+		if romsetFile is None:
+			return
+		removeFromList(self.stems, romsetFile.stem, fileName)
+		removeFromList(self.foldedStems, romsetFile.stem.casefold(), fileName)
+		if "(" in fileName:
+			removeFromList(self.titles, fileName.split("(", 1)[0], fileName)
+		removeFromList(self.renameKeys, getRenameKey(romsetFile.stem), fileName)
+
+	"""
+		Updates the index after a file in the folder has been renamed (or replaced by a file with a different name).
+
+		Parameters
+		----------
+		oldName : str
+			The old file name.
+		newName : str
+			The new file name.
+	"""
+	def renameFile(self, oldName, newName):
+		self.removeFile(oldName)
+		self.removeFile(newName)
+		try:
+			st = stat(path.join(self.folder, newName))
+		except OSError:
+			return
+		self.addFile(newName, st.st_size, st.st_mtime)
+
+	def hasFile(self, fileName):
+		return fileName in self.files
+
+	"""
+		Returns the RomsetFile with the given name, or None if it does not exist.
+	"""
+	def getFile(self, fileName):
+		return self.files.get(fileName)
+
+	"""
+		Returns the file extension (including the ".") of the first file in the folder with the given name (with any extension); if no file with that name is found, return an empty string.
+	"""
+	def getFileExt(self, stem):
+		fileNames = self.stems.get(stem)
+		if not fileNames:
+			return ""
+		return self.files[fileNames[0]].ext
+
+	"""
+		Returns the names of all files whose names (without extension) match the given name when case is ignored, but not when it isn't (for example, "Sega Game (USA).zip" for "SEGA Game (USA)").
+	"""
+	def getCaseMismatches(self, stem):
+		return [f for f in self.foldedStems.get(stem.casefold(), []) if self.files[f].stem != stem]
+
+	"""
+		Returns the names of all files that have the same title as the given ROM name, in other words, that start with the ROM name up to and including its first "(" (for example, "Alpha (Japan).zip" and "Alpha (USA) (Beta).zip" for "Alpha (USA)").
+	"""
+	def getTitleMatches(self, name):
+		if "(" not in name:
+			return []
+		return list(self.titles.get(name.split("(", 1)[0], []))
+
+	"""
+		Returns the names of all files with the same rename key as the given ROM name (see romNames.getRenameKey()), which includes every file that the ROM might have been renamed from.
+	"""
+	def getRenameCandidates(self, name):
+		return list(self.renameKeys.get(getRenameKey(name), []))
+
+def removeFromList(index, key, fileName):
+	fileNames = index[key]
+	fileNames.remove(fileName)
+	if len(fileNames) == 0:
+		del index[key]
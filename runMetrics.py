@@ -0,0 +1,191 @@
+import json
+import threading
+from contextlib import contextmanager
+from os import path
+from time import perf_counter, strftime
+
+# phases in the order that they usually happen; a phase that isn't listed here is added after them
+phaseNames = ["resolve", "parse", "scan", "rename", "verify", "plan", "copy", "cleanup", "save", "log"]
+
+"""
+	The metrics of a single part of a run (a romset, an Other folder or the update folder).
+
+	Parameters
+	----------
+	name : str
+		The name of the part (for example, "Romset - Nintendo - Game Boy").
+
+	Attributes
+	----------
+	phaseSeconds : dict
+		The wall time of each phase, in seconds. Phases don't overlap; time spent in a nested phase only counts towards the nested phase.
+	counts : dict
+		The number of times each kind of file system call was made ("stat", "listdir", "rename", "copy", ...).
+	bytesCopied : int
+		The number of bytes copied.
+	copyLatencies : list (float)
+		The time it took to copy each file, in seconds.
+"""
+class SystemMetrics:
+	def __init__(self, name):
+		self.name = name
+		self.phaseSeconds = {}
+		self.counts = {}
+		self.bytesCopied = 0
+		self.copyLatencies = []
+
+	"""
+		Adds the metrics of another SystemMetrics with the same name (for example, one that was recorded in a worker process).
+	"""
+	def merge(self, other):
+		for phaseName, seconds in other.phaseSeconds.items():
+			self.phaseSeconds[phaseName] = self.phaseSeconds.get(phaseName, 0.0)+seconds
+		for counterName, count in other.counts.items():
+			self.counts[counterName] = self.counts.get(counterName, 0)+count
+		self.bytesCopied += other.bytesCopied
+		self.copyLatencies += other.copyLatencies
+
+	def toDict(self):
+		orderedPhases = [p for p in phaseNames if p in self.phaseSeconds]+sorted(p for p in self.phaseSeconds if p not in phaseNames)
+		copySeconds = self.phaseSeconds.get("copy", 0.0)
+		return {
+			"phaseSeconds" : {p : round(self.phaseSeconds[p], 6) for p in orderedPhases},
+			"totalSeconds" : round(sum(self.phaseSeconds.values()), 6),
+			"counts" : dict(sorted(self.counts.items())),
+			"bytesCopied" : self.bytesCopied,
+			"copyThroughput" : round(self.bytesCopied/copySeconds, 1) if copySeconds > 0 else None,
+			"copyLatency" : getLatencySummary(self.copyLatencies)
+		}
+
+"""
+	Records where the time of a run goes: the wall time of each phase, the number of file system calls and what was copied, separately for each romset and Other folder. Everything can be recorded from several threads; each thread times its own phases.
+"""
+class RunMetrics:
+	def __init__(self):
+		self.systems = {}
+		self.lock = threading.Lock()
+		self.threadPhases = threading.local()
+		self.startTime = perf_counter()
+		self.startedAt = strftime("%Y-%m-%d %H:%M:%S")
+
+	def getSystem(self, name):
+		with self.lock:
+			systemMetrics = self.systems.get(name)
+			if systemMetrics is None:
+				systemMetrics = SystemMetrics(name)
+				self.systems[name] = systemMetrics
+			return systemMetrics
+
+	"""
+		Times a phase of a system. If another phase is already being timed, it is paused until this one ends.
+
+		Parameters
+		----------
+		name : str
+			The name of the system.
+		phaseName : str
+			The name of the phase (see phaseNames).
+	"""
+	@contextmanager
+	def phase(self, name, phaseName):
+		systemMetrics = self.getSystem(name)
+		phaseStack = getattr(self.threadPhases, "stack", None)
+		if phaseStack is None:
+			phaseStack = []
+			self.threadPhases.stack = phaseStack
+		startTime = perf_counter()
+		if len(phaseStack) > 0:
+			self.addPhaseTime(phaseStack[-1], startTime)
+		phaseStack.append([systemMetrics, phaseName, startTime])
+		try:
+			yield
+		finally:
+			endTime = perf_counter()
+			self.addPhaseTime(phaseStack.pop(), endTime)
+			if len(phaseStack) > 0:
+				phaseStack[-1][2] = endTime
+
+	def addPhaseTime(self, currPhase, endTime):
+		systemMetrics, phaseName, startTime = currPhase
+		with self.lock:
+			systemMetrics.phaseSeconds[phaseName] = systemMetrics.phaseSeconds.get(phaseName, 0.0)+endTime-startTime
+
+	"""
+		Yields every item of an iterable, counting the time spent getting each item towards a phase (for example, the time spent reading a database file while its games are scanned).
+	"""
+	def timeIterator(self, iterable, name, phaseName):
+		iterator = iter(iterable)
+		while True:
+			with self.phase(name, phaseName):
+				try:
+					item = next(iterator)
+				except StopIteration:
+					return
+			yield item
+
+	def count(self, name, counterName, num=1):
+		systemMetrics = self.getSystem(name)
+		with self.lock:
+			systemMetrics.counts[counterName] = systemMetrics.counts.get(counterName, 0)+num
+
+	"""
+		Records the files copied by a CopyEngine.
+	"""
+	def addCopies(self, name, copyEngine):
+		systemMetrics = self.getSystem(name)
+		with self.lock:
+			systemMetrics.counts["copy"] = systemMetrics.counts.get("copy", 0)+len(copyEngine.copiedFiles)
+			if len(copyEngine.failedFiles) > 0:
+				systemMetrics.counts["failedCopy"] = systemMetrics.counts.get("failedCopy", 0)+len(copyEngine.failedFiles)
+			systemMetrics.bytesCopied += copyEngine.bytesCopied
+			systemMetrics.copyLatencies += copyEngine.copyLatencies
+
+	def addSystems(self, systems):
+		for name, systemMetrics in systems.items():
+			self.getSystem(name).merge(systemMetrics)
+
+	def toDict(self):
+		return {
+			"startedAt" : self.startedAt,
+			"totalSeconds" : round(perf_counter()-self.startTime, 6),
+			"systems" : {name : self.systems[name].toDict() for name in self.systems}
+		}
+
+	"""
+		Writes the metrics to a JSON file in a folder.
+
+		Parameters
+		----------
+		folder : str
+			The folder to write the metrics file to.
+		deviceName : str
+			The name of the device, which is included in the file name.
+
+		Returns
+		-------
+		str
+			The path of the metrics file.
+	"""
+	def save(self, folder, deviceName):
+		metricsFile = path.join(folder, "Metrics - "+deviceName+" - "+strftime("%Y-%m-%d %H-%M-%S")+".json")
+		with open(metricsFile, "w", encoding="utf-8") as f:
+			json.dump(self.toDict(), f, indent=2)
+		return metricsFile
+
+"""
+	Returns the number, mean, median, 90th and 99th percentile and maximum of a list of latencies (in seconds), or None if the list is empty.
+"""
+def getLatencySummary(latencies):
+	if len(latencies) == 0:
+		return None
+	sortedLatencies = sorted(latencies)
+	def percentile(p):
+		return round(sortedLatencies[min(int(p*len(sortedLatencies)), len(sortedLatencies)-1)], 6)
+	return {
+		"count" : len(sortedLatencies),
+		"mean" : round(sum(sortedLatencies)/len(sortedLatencies), 6),
+		"p50" : percentile(0.5),
+		"p90" : percentile(0.9),
+		"p99" : percentile(0.99),
+		"max" : round(sortedLatencies[-1], 6)
+	}
@@ -53,3 +53,26 @@ profilesFolder = path.join(mainFolder, "Romset Profiles")
 # The folder containing generated log files.
 # If you don't want to generate log files, set logFolder = ""
 logFolder = path.join(mainFolder, "Logs")
+
+# The number of files that are copied to your device at the same time.
+# Higher values are faster on SSDs and most SD cards/USB drives; set this to 1 to copy one file at a time.
+numCopyWorkers = 4
+
+# The number of file checks (whether a file is already on your device, or how big a file is) that are made at the same time.
+# Higher values are faster when your device or folders are slow to respond (for example, through a USB hub or over a network); set this to 1 to check one file at a time.
+maxProbesInFlight = 16
+
+# The folder containing cached hashes of your romset files (used when verifying romsets against database files).
+hashCacheFolder = path.join(mainFolder, "Hash Cache")
+
+# The number of files that are hashed at the same time when verifying romsets.
+numHashWorkers = 4
+
+# The number of systems that are scanned at the same time (each in its own process).
+# When this is more than 1 and several systems are selected, unfound database entries are skipped instead of asking you to correct them.
+numSystemWorkers = 1
+
+# How files are put in your device's rom folder: "copy", "hardlink", "reflink" (a copy-on-write clone) or "symlink".
+# Links only work when the device's rom folder is on the same drive as your romsets (for example, a folder that is shared over a network);
+# any file that can't be linked is copied instead.
+outputMode = "copy"
@@ -65,5 +65,28 @@ def rebuildSettingsFile():
 \n# The folder containing generated log files.\
 \n# If you don't want to generate log files, set logFolder = \"\"\
 \nlogFolder = path.join(mainFolder, \"Logs\")\
+\n\
+\n# The number of files that are copied to your device at the same time.\
+\n# Higher values are faster on SSDs and most SD cards/USB drives; set this to 1 to copy one file at a time.\
+\nnumCopyWorkers = 4\
+\n\
+\n# The number of file checks (whether a file is already on your device, or how big a file is) that are made at the same time.\
+\n# Higher values are faster when your device or folders are slow to respond (for example, through a USB hub or over a network); set this to 1 to check one file at a time.\
+\nmaxProbesInFlight = 16\
+\n\
+\n# The folder containing cached hashes of your romset files (used when verifying romsets against database files).\
+\nhashCacheFolder = path.join(mainFolder, \"Hash Cache\")\
+\n\
+\n# The number of files that are hashed at the same time when verifying romsets.\
+\nnumHashWorkers = 4\
+\n\
+\n# The number of systems that are scanned at the same time (each in its own process).\
+\n# When this is more than 1 and several systems are selected, unfound database entries are skipped instead of asking you to correct them.\
+\nnumSystemWorkers = 1\
+\n\
+\n# How files are put in your device\'s rom folder: \"copy\", \"hardlink\", \"reflink\" (a copy-on-write clone) or \"symlink\".\
+\n# Links only work when the device\'s rom folder is on the same drive as your romsets (for example, a folder that is shared over a network);\
+\n# any file that can\'t be linked is copied instead.\
+\noutputMode = \"copy\"\
 \n""")
 	settingsFile.close()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import json
+import threading
+from os import path, stat, replace
+
+from pathProber import PathProber
+
+manifestFileName = "RomOrganizerManifest.json"
+manifestVersion = 2
+
+"""
+	A record of every file in a device's rom folder, stored in the rom folder itself, so that later runs can tell which files already exist on the device without checking each one.
+
+	Files are grouped by top-level folder (one per system). Along with its files, the manifest saves the modification time of every folder that holds them (and of every folder above those, up to the system folder). Since a folder's modification time changes whenever files directly inside it are added or removed, a system's entries are trusted only if none of those times changed; otherwise (or if the system isn't in the manifest), the system's folder is scanned once and its entries are rebuilt. Checking the folders costs one request per folder, made through the prober, instead of one per file. Files that aren't in the manifest are always checked on the device, so a missing entry never causes a file to be overwritten.
+
+	A manifest can be shared by several threads (for example, by Organizers that copy different systems to the same device at the same time).
+
+	Parameters
+	----------
+	outputFolder : str
+		The device's rom folder.
+	prober : PathProber
+		Optional. Used to scan system folders.
+"""
+class SyncManifest:
+	def __init__(self, outputFolder, prober=None):
+		self.outputFolder = outputFolder
+		self.prober = prober if prober is not None else PathProber()
+		self.manifestFile = path.join(outputFolder, manifestFileName)
+		self.systems = {}
+		self.checkedSystems = set()
+		self.lock = threading.RLock()
+		try:
+			with open(self.manifestFile, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			if data.get("version") == manifestVersion:
+				self.systems = data.get("systems", {})
+		except (OSError, ValueError):
+			self.systems = {}
+
+	def getRelativePath(self, filePath):
+		return path.relpath(filePath, self.outputFolder).replace("\\", "/")
+
+	"""
+		Returns the modification time of each of the given folders (relative to the rom folder), or None for a folder that can't be read.
+	"""
+	def getFolderMtimes(self, relFolders):
+		relFolders = sorted(relFolders)
+		mtimes = self.prober.probe(getMtime, [path.join(self.outputFolder, relFolder) for relFolder in relFolders])
+		return dict(zip(relFolders, mtimes))
+
+	"""
+		Returns whether or not none of the folders saved with a system's entries were changed since they were saved.
+	"""
+	def isSystemCurrent(self, systemEntry):
+		folderMtimes = systemEntry.get("folderMtimes")
+		if not folderMtimes:
+			return False
+		return self.getFolderMtimes(folderMtimes.keys()) == folderMtimes
+
+	"""
+		Makes sure that the given system's entries are up to date, rescanning its folder if they look stale.
+	"""
+	def checkSystem(self, systemName):
+		if systemName in self.checkedSystems:
+			return
+		self.checkedSystems.add(systemName)
+		systemEntry = self.systems.get(systemName)
+		if systemEntry is not None and self.isSystemCurrent(systemEntry):
+			return
+		self.scanSystem(systemName)
+
+	def scanSystem(self, systemName):
+		files = {}
+		for root, dirs, rootFiles in self.prober.walk(path.join(self.outputFolder, systemName), withStats=True):
+			for fileName, st in rootFiles:
+				files[self.getRelativePath(path.join(root, fileName))] = [st.st_size, st.st_mtime]
+		self.systems[systemName] = {"folderMtimes" : self.getFolderMtimes(getEntryFolders(systemName, files)), "files" : files}
+
+	"""
+		Replaces the given system's entries with ones that were already checked elsewhere (for example, in another process), so the system is not checked again.
+
+		Parameters
+		----------
+		systemName : str
+			The system's top-level folder.
+		systemEntry : dict
+			The system's entries, as stored in systems.
+	"""
+	def setSystem(self, systemName, systemEntry):
+		with self.lock:
+			self.systems[systemName] = systemEntry
+			self.checkedSystems.add(systemName)
+
+	"""
+		Returns whether or not the given file is in the manifest. Files that aren't in the manifest are not checked on the device.
+
+		Parameters
+		----------
+		filePath : str
+			The full path of the file (inside the device's rom folder).
+
+		Returns
+		-------
+		bool
+			Whether or not the file is in the manifest.
+	"""
+	def hasFile(self, filePath):
+		relPath = self.getRelativePath(filePath)
+		systemName = relPath.split("/")[0]
+		with self.lock:
+			self.checkSystem(systemName)
+			return relPath in self.systems[systemName]["files"]
+
+	"""
+		Records a file that has just been copied to the device.
+
+		Parameters
+		----------
+		filePath : str
+			The full path of the file (inside the device's rom folder).
+	"""
+	def addFile(self, filePath):
+		relPath = self.getRelativePath(filePath)
+		systemName = relPath.split("/")[0]
+		try:
+			st = stat(filePath)
+		except OSError:
+			return
+		with self.lock:
+			self.checkSystem(systemName)
+			self.systems[systemName]["files"][relPath] = [st.st_size, st.st_mtime]
+
+	"""
+		Writes the manifest to the device. The modification times of the folders of each checked system are saved as they are now, after any files were copied.
+	"""
+	def save(self):
+		with self.lock:
+			for systemName in self.checkedSystems:
+				systemEntry = self.systems[systemName]
+				systemEntry["folderMtimes"] = self.getFolderMtimes(getEntryFolders(systemName, systemEntry["files"]))
+			tempFile = self.manifestFile+".tmp"
+			try:
+				with open(tempFile, "w", encoding="utf-8") as f:
+					json.dump({"version" : manifestVersion, "systems" : self.systems}, f, separators=(",", ":"))
+				replace(tempFile, self.manifestFile)
+			except OSError:
+				print("WARNING: Could not write the sync manifest to "+self.manifestFile)
+
+"""
+	Returns the folders (relative to the rom folder) that hold a system's files, along with every folder above them up to the system folder, which is always included.
+"""
+def getEntryFolders(systemName, files):
+	folders = {systemName}
+	for relPath in files:
+		relFolder = relPath.rsplit("/", 1)[0]
+		while relFolder not in folders:
+			folders.add(relFolder)
+			relFolder = relFolder.rsplit("/", 1)[0]
+	return folders
+
+def getMtime(folder):
+	try:
+		return stat(folder).st_mtime
+	except OSError:
+		return None
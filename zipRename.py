@@ -0,0 +1,175 @@
+import shutil
+import struct
+import zipfile
+from os import path, remove, rename, replace
+
+# files that list the names of other files in the same archive; their contents are updated when those files are renamed
+fileListExts = [".cue", ".gdi", ".m3u", ".ccd"]
+maxFileListSize = 1<<20
+
+localHeaderStruct = struct.Struct("<4sHHHHHIIIHH")
+localHeaderSignature = b"PK\x03\x04"
+zip64ExtraId = 0x0001
+dataDescriptorFlag = 0x08
+encryptedFlag = 0x01
+# copying compressed data as it is relies on these attributes of zipfile.ZipFile, which aren't part of its documented interface; with a version of Python that doesn't have them, files are decompressed and recompressed instead
+rawCopyAttributes = ["fp", "filelist", "NameToInfo", "start_dir"]
+
+"""
+	Renames a zip archive and the files inside it, without decompressing or recompressing anything.
+
+	A new archive is written next to the old one: the header of each file is rewritten with the file's new name, and the compressed data is copied byte-for-byte. The new archive is then atomically moved to the new path before the old one is removed, so an interruption never leaves a half-written archive, or no archive at all. Small file lists (such as .cue and .gdi files) that mention renamed files are rewritten with the new names.
+
+	Files whose names start with the archive's old name are renamed to start with the new name instead (for example, "Game (Track 1).bin" in "Game.zip"). If the archive contains only one file, that file is always renamed to the new name, keeping its extension. Any folder in a file's name is kept as it is.
+
+	Parameters
+	----------
+	currPath : str
+		The archive.
+	newPath : str
+		The new path of the archive. This can be the same as currPath (apart from capitalization).
+	newName : str
+		The new name (without extension) of the archive's contents.
+
+	Returns
+	-------
+	int
+		The number of files inside the archive that were renamed.
+
+	Raises
+	------
+	zipfile.BadZipFile
+		If the archive is damaged, or contains encrypted files (which can't be renamed without knowing the password).
+	FileExistsError
+		If a different file already exists at newPath.
+	NotImplementedError
+		If a file list in the archive uses a compression method that isn't supported.
+"""
+def renameZipArchive(currPath, newPath, newName):
+	tempPath = currPath+".renaming"
+	oldName = path.splitext(path.basename(currPath))[0]
+	# on drives that ignore capitalization, newPath may be the same file as currPath
+	isSameFile = currPath == newPath or (path.exists(newPath) and path.samefile(currPath, newPath))
+	if not isSameFile and path.exists(newPath):
+		raise FileExistsError("Another file already has the new name: "+newPath)
+	try:
+		with open(currPath, "rb") as src, zipfile.ZipFile(currPath, "r") as oldZip:
+			oldInfos = oldZip.infolist()
+			newNames = getNewMemberNames(oldInfos, oldName, newName)
+			with zipfile.ZipFile(tempPath, "w", allowZip64=True) as newZip:
+				copyRaw = all(hasattr(newZip, attribute) for attribute in rawCopyAttributes)
+				for oldInfo in oldInfos:
+					if path.splitext(oldInfo.filename)[1].lower() in fileListExts and oldInfo.file_size <= maxFileListSize:
+						rewriteFileList(oldZip, oldInfo, newZip, newNames)
+					elif copyRaw:
+						copyRawMember(src, oldInfo, newZip, newNames[oldInfo.filename])
+					else:
+						recompressMember(oldZip, oldInfo, newZip, newNames[oldInfo.filename])
+				newZip.comment = oldZip.comment
+		if isSameFile:
+			replace(tempPath, currPath)
+		else:
+			replace(tempPath, newPath)
+	except:
+		if path.isfile(tempPath):
+			remove(tempPath)
+		raise
+	if isSameFile:
+		if currPath != newPath:
+			rename(currPath, newPath)
+	else:
+		remove(currPath)
+	return sum(1 for oldInfo in oldInfos if newNames[oldInfo.filename] != oldInfo.filename)
+
+def getNewMemberNames(oldInfos, oldName, newName):
+	newNames = {}
+	files = [oldInfo for oldInfo in oldInfos if not oldInfo.is_dir()]
+	for oldInfo in oldInfos:
+		memberFolder, memberName = splitMemberName(oldInfo.filename)
+		if oldInfo.is_dir():
+			newNames[oldInfo.filename] = oldInfo.filename
+		elif len(files) == 1:
+			newNames[oldInfo.filename] = memberFolder+newName+path.splitext(memberName)[1]
+		elif memberName.lower().startswith(oldName.lower()):
+			newNames[oldInfo.filename] = memberFolder+newName+memberName[len(oldName):]
+		else:
+			newNames[oldInfo.filename] = oldInfo.filename
+	return newNames
+
+# zips created by older versions of this program store their contents as "\name"
+def splitMemberName(memberName):
+	splitIndex = max(memberName.rfind("/"), memberName.rfind("\\"))+1
+	return memberName[:splitIndex], memberName[splitIndex:]
+
+def getNewZipInfo(oldInfo, newFileName):
+	newInfo = zipfile.ZipInfo(newFileName, oldInfo.date_time)
+	newInfo.compress_type = oldInfo.compress_type
+	newInfo.comment = oldInfo.comment
+	newInfo.create_system = oldInfo.create_system
+	newInfo.create_version = oldInfo.create_version
+	newInfo.extract_version = oldInfo.extract_version
+	newInfo.internal_attr = oldInfo.internal_attr
+	newInfo.external_attr = oldInfo.external_attr
+	newInfo.extra = stripZip64Extra(oldInfo.extra)
+	# the sizes and CRC are written in the new header, so no data descriptor is needed
+	newInfo.flag_bits = oldInfo.flag_bits & ~dataDescriptorFlag & ~0x800
+	newInfo.CRC = oldInfo.CRC
+	newInfo.compress_size = oldInfo.compress_size
+	newInfo.file_size = oldInfo.file_size
+	return newInfo
+
+# the zip64 extra field is rebuilt by zipfile whenever it is needed
+def stripZip64Extra(extra):
+	keptFields = []
+	i = 0
+	while i+4 <= len(extra):
+		fieldId, fieldSize = struct.unpack("<HH", extra[i:i+4])
+		if fieldId != zip64ExtraId:
+			keptFields.append(extra[i:i+4+fieldSize])
+		i += 4+fieldSize
+	return b"".join(keptFields)
+
+def copyRawMember(src, oldInfo, newZip, newFileName):
+	if oldInfo.flag_bits & encryptedFlag:
+		raise zipfile.BadZipFile("Encrypted files can't be renamed: "+oldInfo.filename)
+	src.seek(oldInfo.header_offset)
+	localHeader = src.read(localHeaderStruct.size)
+	if len(localHeader) != localHeaderStruct.size:
+		raise zipfile.BadZipFile("Truncated file header: "+oldInfo.filename)
+	localHeader = localHeaderStruct.unpack(localHeader)
+	if localHeader[0] != localHeaderSignature:
+		raise zipfile.BadZipFile("Bad file header: "+oldInfo.filename)
+	src.seek(oldInfo.header_offset+localHeaderStruct.size+localHeader[9]+localHeader[10])
+	newInfo = getNewZipInfo(oldInfo, newFileName)
+	fp = newZip.fp
+	newInfo.header_offset = fp.tell()
+	fp.write(newInfo.FileHeader())
+	bytesLeft = oldInfo.compress_size
+	while bytesLeft > 0:
+		chunk = src.read(min(bytesLeft, 1<<20))
+		if len(chunk) == 0:
+			raise zipfile.BadZipFile("Truncated file data: "+oldInfo.filename)
+		fp.write(chunk)
+		bytesLeft -= len(chunk)
+	newZip.filelist.append(newInfo)
+	newZip.NameToInfo[newInfo.filename] = newInfo
+	newZip.start_dir = fp.tell()
+
+def recompressMember(oldZip, oldInfo, newZip, newFileName):
+	if oldInfo.flag_bits & encryptedFlag:
+		raise zipfile.BadZipFile("Encrypted files can't be renamed: "+oldInfo.filename)
+	newInfo = getNewZipInfo(oldInfo, newFileName)
+	with oldZip.open(oldInfo) as src, newZip.open(newInfo, "w", force_zip64=(oldInfo.file_size >= zipfile.ZIP64_LIMIT)) as dst:
+		shutil.copyfileobj(src, dst, 1<<20)
+
+def rewriteFileList(oldZip, oldInfo, newZip, newNames):
+	if oldInfo.flag_bits & encryptedFlag:
+		raise zipfile.BadZipFile("Encrypted files can't be renamed: "+oldInfo.filename)
+	contents = oldZip.read(oldInfo)
+	for oldFileName, newFileName in newNames.items():
+		oldMemberName = splitMemberName(oldFileName)[1].encode("utf-8")
+		newMemberName = splitMemberName(newFileName)[1].encode("utf-8")
+		if oldMemberName != newMemberName:
+			contents = contents.replace(oldMemberName, newMemberName)
+	newInfo = getNewZipInfo(oldInfo, newNames[oldInfo.filename])
+	newZip.writestr(newInfo, contents)